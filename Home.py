@@ -1,77 +1,35 @@
 import streamlit as st
 from streamlit.runtime.scriptrunner import RerunException
-import pickle
-import json
+import datetime
 import logging
-import re
-from requests import Session
-import pandas as pd
 
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-from fantraxapi import FantraxAPI
-
-import utils
+import fantrax_cache
+import fantrax_session
+import llm_cache
+import streaming
+import telemetry
+import prefetch
+import recommendations
+import session_state
+import transport
 
 logging.basicConfig(filename='selenium.log', level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
 
+LLM_MODEL = recommendations.LLM_MODEL
+LLM_TEMPERATURE = recommendations.LLM_TEMPERATURE
+
 st.title("Fantrax Fantasy Hockey Analysis")
 
 # *** SOME HELPERS ***
-def initialize_driver():
-    service = Service()
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)")
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    options.add_experimental_option('useAutomationExtension', False)
-    return webdriver.Chrome(service=service, options=options)
-
 def login_to_fantrax(username, password):
-    driver = initialize_driver()
-    wait = WebDriverWait(driver, 10)
     try:
-        logging.info("Navigating to the Fantrax login page.")
-        driver.get("https://www.fantrax.com/login")
-        username_field = wait.until(EC.presence_of_element_located((By.ID, 'mat-input-0')))
-        password_field = driver.find_element(By.ID, 'mat-input-1')
-        login_button = driver.find_element(By.XPATH, '//button[@type="submit"]')
-
-        logging.info("Entering user credentials.")
-        username_field.send_keys(username)
-        password_field.send_keys(password)
-        login_button.click()
-
-        logging.info("Waiting for login to process.")
-        wait.until(EC.url_contains('/league/'))
-
-        current_url = driver.current_url       
-        match = re.search(r'/league/(\w+)/', current_url)
-        if match:
-            league_id = match.group(1)
+        store = fantrax_session.SessionStore(st.secrets.get("session_store_dir", ".sessions"), st.secrets.get("session_store_key"))
+        pool = fantrax_session.get_pool(st.secrets.get("driver_pool_size", 2))
+        session, league_id = fantrax_session.login(username, password, store, pool)
+        if league_id:
             st.session_state['league_id'] = league_id
             st.session_state['username'] = username
             st.session_state['logged_in'] = True
-
-            cookies = driver.get_cookies()
-            with open("fantraxloggedin.cookie", "wb") as f:
-                pickle.dump(cookies, f)
-
-            session = Session()
-            for cookie in cookies:
-                session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'])
             st.session_state['session'] = session
 
             st.sidebar.success(f"Login successful! League ID: {league_id}")
@@ -80,10 +38,10 @@ def login_to_fantrax(username, password):
             st.error("Failed to extract league ID.")
     except Exception as e:
         st.error(f"An error occurred: {e}")
-    finally:
-        driver.quit()
 
 def display_login():
+    # Browsers start while the credentials are typed, in case the stored session can't be reused
+    fantrax_session.get_pool(st.secrets.get("driver_pool_size", 2), warm=True)
     username = st.sidebar.text_input("Username")
     password = st.sidebar.text_input("Password", type="password")
     if st.sidebar.button("Login to Fantrax"):
@@ -91,11 +49,7 @@ def display_login():
 
 def fetch_and_display_standings(api):
     try:
-        if 'standings_collection' not in st.session_state:
-            standings_collection = api.standings()
-            st.session_state['standings_collection'] = standings_collection
-        else:
-            standings_collection = st.session_state['standings_collection']
+        standings_collection = fantrax_cache.standings(api)
 
         stats_tables = [caption for section in standings_collection.standings for caption, _ in section.items()]
 
@@ -104,9 +58,13 @@ def fetch_and_display_standings(api):
         else:
             stats = st.selectbox("Choose your Stat:", stats_tables, index=0)
 
-        standings_df = utils.standings_to_dataframe(standings_collection, stats)
+        # Converted once per league and snapshot; this session gets its own copy
+        standings_df = session_state.league_store(api.league_id).standings(api, stats)
+        if standings_df is None:
+            return None
         
         st.markdown(f"#### {stats}")
+        st.caption(f"Standings {prefetch.format_age(fantrax_cache.age(api, 'standings'))}")
         st.dataframe(standings_df)
         
         return standings_df
@@ -119,55 +77,106 @@ def fetch_and_display_team_roster(api):
     st.session_state['selected_team_id'] = api.default_team_id
     
     try:
-        roster_df = utils.fetch_team_roster(api, st.session_state['selected_team_id'])
-        roster = st.session_state['roster']
+        # Converted once per league and snapshot, this session gets its own copy; the raw roster is read from the Fantrax cache
+        roster_df = session_state.league_store(api.league_id).roster(api, st.session_state['selected_team_id'])
+        roster = fantrax_cache.roster_info(api, st.session_state['selected_team_id'])
 
         st.markdown(f"#### {roster.team.name} Roster")
         st.write(f"Active: {roster.active}, Reserve: {roster.reserve}, Injured: {roster.injured}, Max: {roster.max}")
+        st.caption(f"Roster {prefetch.format_age(fantrax_cache.age(api, 'roster_info', st.session_state['selected_team_id']))}")
         st.dataframe(roster_df)
         return roster_df
     except Exception as e:
         st.error(f"Error fetching roster: {e}")
         return None        
 
-@st.cache_data(show_spinner=True)
-def generate_recommendations(prompt):
-    try:
-        response = chat_model.invoke(prompt)
-        if response:
-            return response.content
-    except Exception as e:
-        st.error(f"Error fetching recommendations: {e}")
+def hedge_model():
+    # Optional second provider, raced against Gemini once it runs slower than its usual tail latency
+    cfg = dict(st.secrets.get("llm_hedge", {}))
+    if not cfg.get("provider"):
+        return None
+    return transport.chat_model(cfg["provider"], cfg["model"], cfg["api_key"], st.secrets.get("llm_timeout", 60), LLM_TEMPERATURE)
+
+def generate_recommendations(prompt, ttl=None, placeholder=None, show_errors=True):
+    # Cached answers expire with the Fantrax data they were built from. Worker threads pass show_errors=False:
+    # they have no script context to render into, so failures are raised back to the main thread instead.
+    ttl = ttl or st.secrets.get("llm_cache_ttl", fantrax_cache.ttl_for("standings"))
+    response_cache = llm_cache.get_cache(st.secrets.get("llm_cache_path", "llm_cache.sqlite3"))
+    key = llm_cache.cache_key(prompt, LLM_MODEL, LLM_TEMPERATURE)
+    with telemetry.span("llm.gemini.recommendation", model=LLM_MODEL, stream=placeholder is not None) as span:
+        span["prompt_tokens"] = prompt_context.estimate_tokens(prompt)
+        cached = response_cache.get(key)
+        span["cache"] = "hit" if cached is not None else "miss"
+        if cached is not None:
+            if placeholder is not None:
+                placeholder.markdown(cached)
+            return cached
+        try:
+            if placeholder is not None:
+                with st.spinner("Generating recommendations..."):
+                    content = stream_recommendations(prompt, placeholder, span)
+            else:
+                response = transport.hedged("llm.gemini", lambda: chat_model.invoke(prompt),
+                                            (lambda: hedge.invoke(prompt)) if hedge is not None else None,
+                                            percentile=st.secrets.get("llm_hedge_percentile", 0.95))
+                content = response.content if response else None
+                usage = getattr(response, "usage_metadata", None) or {}
+                span["prompt_tokens"] = usage.get("input_tokens", span["prompt_tokens"])
+            if content:
+                span["completion_tokens"] = prompt_context.estimate_tokens(content)
+                response_cache.set(key, content, ttl, model=LLM_MODEL)
+                return content
+        except Exception as e:
+            span["error"] = repr(e)
+            if not show_errors:
+                raise
+            st.error(f"Error fetching recommendations: {e}")
     return None
 
-def run_player_evaluation(api, context):
+def stream_recommendations(prompt, placeholder, span):
+    # A stream can't be raced once it has started rendering, so only skip to the backup while Gemini's circuit is open
+    circuit = transport.breaker("llm.gemini")
+    model = hedge if hedge is not None and circuit.state == "open" else chat_model
     try:
-        free_agents = []
-        evaluations = []
-        for position in ['F','D','G']:
-            fa = utils.fetch_free_agents(api, position)
-            if fa is not None:
-                for p in fa:
-                    free_agents.append(p)
-
-            for player in free_agents:
-                evaluation_prompt = f"""
-                    Given the player details {player} and the context {context}, evaluate if this player is a good fit for the team.
-                    If adding this player, suggest who they should replace on the current roste. Provide concise reasons using key stats. Use the following template:
-                    - **[Player Name]** is a good fit for [Position]: [Reason in relation to team needs and recommendations], or
-                    - **[Player Name]** is a not good fit for [Position]: [Reason in relation to team needs and recommendations] 
-                """               
-                response = generate_recommendations(evaluation_prompt)
-                if response:
-                    if 'is a good fit' in response.lower():
-                        evaluations.append({"player": player, "evaluation": response})
-                        free_agents = []
-                        break
-        
-        return evaluations
-    except Exception as e:
-        print(f"Error during player evaluation execution: {e}")
-        return []
+        content, timing = streaming.render_stream(placeholder, (chunk.content for chunk in model.stream(prompt)))
+    except Exception:
+        if model is chat_model:
+            circuit.failure()
+        raise
+    if model is chat_model:
+        circuit.success()
+    span["ttft_ms"] = round(timing["ttft"] * 1000, 3) if timing["ttft"] is not None else None
+    st.caption(streaming.format_timing(timing))
+    return content
+
+def run_player_evaluation(api, context, standings_df, shortlists=None, positions=None):
+    # Session values are read here, the evaluation itself runs on worker threads; their errors are shown once back here
+    errors = []
+    evaluations = recommendations.evaluate_free_agents(
+        api,
+        context,
+        standings_df,
+        st.session_state['selected_team_name'],
+        lambda prompt: generate_recommendations(prompt, ttl=fantrax_cache.ttl_for("get_available_players"), show_errors=False),
+        k=st.secrets.get("eval_shortlist", 3),
+        max_workers=st.secrets.get("eval_concurrency", 4),
+        batch_size=st.secrets.get("eval_batch_size", 1),
+        shortlists=shortlists,
+        positions=positions,
+        errors=errors,
+    )
+    for message in dict.fromkeys(str(error) for error in errors):
+        st.error(f"Error evaluating free agents: {message}")
+    return evaluations
+
+def display_changes(changes, previous, threshold):
+    lines = change_detection.describe(changes)
+    label = f"What changed since the last analysis ({len(lines)})" if lines else "No changes since the last analysis"
+    with st.expander(label):
+        for line in lines:
+            st.markdown(f"- {line}")
+        st.caption(f"Analyzed {previous['analyzed_at']:%H:%M}. Change score {change_detection.score(changes):g}, "
+                   f"the analysis reruns at {threshold:g}.")
 
 # *** SIDEBAR ***
 if not st.session_state.get('logged_in', False):
@@ -175,68 +184,95 @@ if not st.session_state.get('logged_in', False):
 else:
     st.sidebar.write("Logged in as:", st.session_state['username'])
     st.sidebar.write("League ID:", st.session_state['league_id'])
+    if st.sidebar.button("Refresh League Data"):
+        fantrax_cache.invalidate(league_id=st.session_state['league_id'])
+        st.rerun()
+    telemetry.render_panel()
+    # Registers this session, so the manager can report its memory and evict it once idle
+    session_state.current()
+    session_state.render_memory()
     if st.sidebar.button("Logout"):
+        session_state.evict_current()
+        prefetch.get_prefetcher().unregister(telemetry.current_session())
         st.session_state.clear()
         st.experimental_set_query_params()
         raise RerunException(None)
 
 # *** MAIN ROSTER PAGE ***
 if 'logged_in' in st.session_state and st.session_state['logged_in']:
-    api = FantraxAPI(st.session_state['league_id'], session=st.session_state['session'])
+    # Heavy dependencies only load once logged in, the login screen never pays for them
+    import prompt_context
+    import change_detection
+
+    api = fantrax_session.api_for(st.session_state['league_id'], st.session_state['session'])
+    if st.secrets.get("prefetch_interval", 0):
+        # Keep this league warm in the background so later renders never wait on Fantrax
+        prefetcher = prefetch.get_prefetcher(st.secrets.get("prefetch_interval"), st.secrets.get("prefetch_idle_timeout", 1800))
+        prefetcher.register(st.session_state['league_id'], st.session_state['session'], telemetry.current_session())
     standings_df = fetch_and_display_standings(api)
     roster_df = fetch_and_display_team_roster(api)
 
     if standings_df is not None and roster_df is not None:
         # Prompt and Recommendations
-        input_data = {
-            "current_roster": json.loads(roster_df.to_json(orient="records")),
-            "standings": json.loads(standings_df.to_json(orient="records"))
-        }
-
-        recommendation_prompt = f"""
-            You are an expert fantasy hockey advisor. Analyze the current roster and league standings to suggest improvements for {st.session_state['selected_team_name']}.
-            Current Roster: {json.dumps(input_data['current_roster'], indent=2)}
-            League Standings: {json.dumps(input_data['standings'], indent=2)}
-            Instructions:
-            - Provide a detailed analysis of the team's strengths and weaknesses. Use the response template provided.
-            - Recommend actions: pick up, drop, or trade players. Justify each recommendation with specific statistics.
-            - For player pickups, describe desired characteristics (e.g., high goal-scoring ability) to assist in searching free agents.
-            - Be blunt when assessing underperformers—no sugarcoating - name players explicitly when assessing underperformers.
-            - Keep responses to 275 words max.
-            Response Template:
-            Current Situation: [Team Name] is ranked [Current Rank] with [Points Total] points. Areas that need improvement include:
-            - Statistic 1: (e.g., Goals: [X], below league leaders.)
-            - Statistic 2: (e.g., Assists: [X], significantly lower than the top teams.)
-            - Goalie Stats: (e.g., Save percentage and shutouts fall below league average.)
-            - Overall Performance: [Team Name] lags in combined offensive and defensive stats.
-            - Top Performers: (e.g., [Top Player] excels in goals/assists.)
-            - Bottom Performers: (e.g., [Underperforming Player] is falling short.)
-            Recommendations:
-              * Focus Area 1:
-                - Recommendation: (e.g., Acquire a high-scoring forward. Look for consistent scorers with 10+ goals or 15+ assists.)
-                - Rationale: (e.g., More scoring power is key to closing the gap with the league leaders.)
-              * Focus Area 2:
-                - Recommendation: (e.g., Improve goaltending by adding a goalie with a save percentage above .910.)
-                - Rationale: (e.g., Stronger goaltending will improve point stability and boost ranking.) 
-        """            
+        recommendation_prompt, prompt_data = recommendations.recommendation_prompt(
+            api, st.session_state['selected_team_name'], roster_df, standings_df,
+            st.secrets.get("prompt_token_budget", 3000), st.secrets.get("projection_sims", 2000))
 
         if st.session_state['league_id'] in st.secrets.get("league_whitelist", []):
             llm_api_key = st.secrets.get("gemini_key")
         else:
             llm_api_key = st.text_input("Enter your Google Generative AI API key:", type="password")     
 
+        st.caption(f"Prompt context: ~{prompt_data['tokens']} tokens")
         if llm_api_key:
-            chat_model = ChatGoogleGenerativeAI(model='gemini-1.5-flash-8b', google_api_key=llm_api_key, temperature=0.8)
-            response_content = generate_recommendations(recommendation_prompt)
+            chat_model = transport.chat_model("Gemini", LLM_MODEL, llm_api_key, st.secrets.get("llm_timeout", 60), LLM_TEMPERATURE)
+            hedge = hedge_model()
+            st.subheader(f"Recommendations for Team: {st.session_state['selected_team_name']}")
+
+            # Only a material change to the roster or standings since the last analysis pays for a new one
+            league = session_state.league_store(st.session_state['league_id'])
+            analysis_key = (st.session_state['selected_team_id'], tuple(standings_df.columns))
+            shortlists = recommendations.shortlist_free_agents(api, standings_df, st.session_state['selected_team_name'],
+                                                               k=st.secrets.get("eval_shortlist", 3))
+            current = change_detection.snapshot(roster_df, standings_df, shortlists)
+            previous = league.last_analysis(analysis_key)
+            threshold = st.secrets.get("reanalysis_threshold", 1.0)
+            changes = None
+            if previous is not None:
+                changes = change_detection.diff(previous["snapshot"], current, st.secrets.get("change_tolerance", 0.05))
+                display_changes(changes, previous, threshold)
+            rerun = previous is None or st.button("Re-run analysis") or change_detection.is_material(changes, threshold)
+
+            if rerun:
+                response_content = generate_recommendations(recommendation_prompt, placeholder=st.empty())
+                positions, evaluations, baseline = None, {}, current
+            else:
+                response_content = previous["recommendation"]
+                st.markdown(response_content)
+                # Free agents are re-evaluated only where the shortlist itself changed
+                positions = change_detection.changed_positions(changes)
+                evaluations = dict(previous["evaluations"])
+                # Roster and standings stay diffed against the analyzed snapshot, so small changes still add up
+                baseline = {**previous["snapshot"], **{f"free_agents.{position}": current[f"free_agents.{position}"] for position in positions}}
+
             if response_content:
-                st.subheader(f"Recommendations for Team: {st.session_state['selected_team_name']}")
-                st.write(response_content)
-                context = {"recommendation": response_content}
-                evaluations = run_player_evaluation(api, context)
-                
+                if positions is None or positions:
+                    for position in positions or []:
+                        evaluations.pop(position, None)
+                    context = {"recommendation": response_content}
+                    with st.spinner("Evaluating free agents..."):
+                        for evaluation in run_player_evaluation(api, context, standings_df, shortlists, positions):
+                            evaluations[evaluation["position"]] = evaluation
+                league.save_analysis(analysis_key, {
+                    "snapshot": baseline,
+                    "recommendation": response_content,
+                    "evaluations": evaluations,
+                    "analyzed_at": previous["analyzed_at"] if not rerun else datetime.datetime.now(),
+                })
+
                 if evaluations:
                     st.markdown("#### Possible Free Agents to Add")
-                    for eval in evaluations:
-                        st.markdown(f"{eval['evaluation']}")               
+                    for eval in evaluations.values():
+                        st.markdown(f"{eval['evaluation']}")
 else:
     st.info("Please log in using the sidebar to proceed.")
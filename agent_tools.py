@@ -0,0 +1,329 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from langchain_core.tools import StructuredTool
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+import fantrax_cache
+import fantrax_session
+import utils
+import prompt_context
+import league_rosters
+import player_index
+import telemetry
+
+PROMPT_REF = "danglesnipecelly/fantasy-hockey-coach:e8792e65"
+PROMPT_CACHE_DIR = ".prompt_cache"
+
+FALLBACK_SYSTEM = """You are the head coach of a fantasy hockey team, guiding the user, the GM, with humor, strategy and insights.
+Speak like a seasoned hockey player and coach: gritty, humorous, chirping with hockey cliches but always constructive.
+Use your tools to look up the roster, standings, free agents, news and scores instead of guessing, and cite specific stats.
+
+Respond to the human as helpfully and accurately as possible. You have access to the following tools:
+
+{tools}
+
+Use a json blob to specify a tool by providing an action key (tool name) and an action_input key (tool input).
+
+Valid "action" values: "Final Answer" or {tool_names}
+
+Provide only ONE action per $JSON_BLOB, as shown:
+
+```
+{{
+  "action": $TOOL_NAME,
+  "action_input": $INPUT
+}}
+```
+
+Follow this format:
+
+Question: input question to answer
+Thought: consider previous and subsequent steps
+Action:
+```
+$JSON_BLOB
+```
+Observation: action result
+... (repeat Thought/Action/Observation N times)
+Thought: I know what to respond
+Action:
+```
+{{
+  "action": "Final Answer",
+  "action_input": "Final response to human"
+}}
+```
+
+Begin! Reminder to ALWAYS respond with a valid json blob of a single action. Use tools if necessary. Respond directly if appropriate. Format is Action:```$JSON_BLOB```then Observation"""
+
+FALLBACK_HUMAN = """{input}
+
+{agent_scratchpad}
+ (reminder to respond in a JSON blob no matter what)"""
+
+def fallback_chat_prompt():
+    return ChatPromptTemplate.from_messages([
+        ("system", FALLBACK_SYSTEM),
+        MessagesPlaceholder("chat_history", optional=True),
+        ("human", FALLBACK_HUMAN),
+    ])
+
+@st.cache_resource(show_spinner=False)
+def load_chat_prompt(ref=PROMPT_REF, cache_dir=PROMPT_CACHE_DIR):
+    from langchain_core.load import dumps, loads
+
+    # The ref is pinned to a commit, so a cached copy never goes stale
+    path = os.path.join(cache_dir, ref.replace("/", "__").replace(":", "@") + ".json")
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return loads(f.read())
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable cached prompt {path}: {e}")
+
+    try:
+        from langchain import hub
+        prompt = hub.pull(ref)
+    except Exception as e:
+        logging.warning(f"Could not pull {ref}, using bundled prompt: {e}")
+        return fallback_chat_prompt()
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(dumps(prompt))
+    except Exception as e:
+        logging.warning(f"Could not cache prompt {ref}: {e}")
+    return prompt
+
+SESSION_KEYS = ('league_id', 'session', 'selected_team_id', 'selected_team_name')
+_session_snapshot = contextvars.ContextVar("agent_tool_session", default=None)
+
+def session_value(key):
+    snapshot = _session_snapshot.get()
+    return snapshot[key] if snapshot is not None else st.session_state[key]
+
+def run_with_session(coro_fn):
+    # Async tools run on worker threads with no script context, so hand them a snapshot of the session
+    token = _session_snapshot.set({key: st.session_state.get(key) for key in SESSION_KEYS})
+    try:
+        return telemetry.bind(lambda: asyncio.run(coro_fn()))()
+    finally:
+        _session_snapshot.reset(token)
+
+# Tools read the session at call time so one tool list can serve every session
+def current_api():
+    return fantrax_session.api_for(session_value('league_id'), session_value('session'))
+
+def token_budget():
+    return st.secrets.get("prompt_token_budget", 3000)
+
+# Seconds each tool result is reused, overridable via the [tool_cache] secrets section
+TOOL_TTLS = {
+    "search_resolved_player_news": 900,
+    "search_game_scores": 120,
+    "fetch_league_standings": 300,
+    "fetch_user_team_roster": 300,
+    "fetch_opposing_team_roster": 300,
+    "fetch_current_free_agents": 600,
+    "project_standings": 300,
+}
+
+tool_cache = fantrax_cache.TTLCache(max_entries=512)
+
+# Tools that were renamed keep honouring overrides written for their old name
+TOOL_TTL_ALIASES = {"search_resolved_player_news": "search_player_news"}
+
+def tool_ttl(name):
+    overrides = dict(st.secrets.get("tool_cache", {}))
+    for key in (name, TOOL_TTL_ALIASES.get(name)):
+        if key and f"ttl_{key}" in overrides:
+            return overrides[f"ttl_{key}"]
+    return TOOL_TTLS[name]
+
+def normalize_arg(value):
+    return " ".join(str(value).lower().split())
+
+def league_scope():
+    return (session_value('league_id'),)
+
+def team_scope():
+    return (session_value('league_id'), session_value('selected_team_id'))
+
+class ToolError(str):
+    # Shown to the agent as the observation like any result, but never cached
+    pass
+
+def cacheable(result):
+    # The utils fetchers return None when Fantrax fails; a transient failure must not be served for a whole TTL
+    return result is not None and not isinstance(result, ToolError)
+
+def cached_tool(scope=tuple):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            # The key is shared by every session with the same scope; exceptions propagate and are not cached
+            key = (fn.__name__, *scope(), *(normalize_arg(arg) for arg in args),
+                   *sorted((name, normalize_arg(value)) for name, value in kwargs.items()))
+            return tool_cache.get_or_load(key, lambda: fn(*args, **kwargs), tool_ttl(fn.__name__), cache_if=cacheable)
+        return wrapper
+    return decorator
+
+@functools.lru_cache(maxsize=1)
+def search_client():
+    from langchain_community.tools import TavilySearchResults
+    return TavilySearchResults(
+        max_results=5,
+        search_params={
+            "time_range": "1d",
+            "sort_by": "date"
+        }
+    )
+
+@cached_tool(team_scope)
+def fetch_league_standings():
+    standings = utils.fetch_standings(current_api(), raise_errors=True)
+    standings['is_my_team'] = standings['team'].apply(lambda x: str(x).lower() == session_value('selected_team_name').lower())
+    return prompt_context.encode_frame(standings)[0]
+
+@cached_tool(team_scope)
+def fetch_user_team_roster():
+    roster = utils.fetch_team_roster(current_api(), session_value('selected_team_id'), raise_errors=True)
+    return prompt_context.encode_frame(roster, prompt_context.ROSTER_DROP_ORDER, token_budget())[0]
+
+@cached_tool(league_scope)
+def fetch_opposing_team_roster(team_name):
+    # One concurrent pass warms every team, later trade questions are answered from memory
+    api = current_api()
+    rosters = league_rosters.load(api)
+    matches = player_index.load(api).lookup(team_name, kind="team", limit=3)
+    if not matches:
+        return ToolError(f"No team named {team_name}. Teams: {', '.join(rosters.team_names())}")
+    roster = rosters.frame(matches[0][0]["team_id"])
+    if roster is None:
+        return ToolError(f"Could not load the roster of {matches[0][0]['name']}, try again shortly.")
+    return prompt_context.encode_frame(roster, prompt_context.ROSTER_DROP_ORDER, token_budget())[0]
+
+def fetch_user_team_name():
+    return session_value('selected_team_name')
+
+@cached_tool(league_scope)
+def fetch_current_free_agents(position: str, min_games: int = 0):
+    import player_pool
+    where = [player_pool.min_games(min_games)] if min_games else ()
+    return utils.fetch_free_agents(current_api(), position, where=where)
+
+def resolve_player(query):
+    # LLM-written names are often misspelled; search on the league's spelling when there is a close match.
+    # Only the user's roster and an index some other tool already built are consulted, never a league-wide load.
+    try:
+        api = current_api()
+        team_id = session_value('selected_team_id')
+        index = player_index.PlayerIndex()
+        player_index.add_roster(index, team_id, session_value('selected_team_name'), fantrax_cache.roster_info(api, team_id))
+        entry = index.best(query, kind="player")
+        if entry is None and player_index.cached(api.league_id) is not None:
+            entry = player_index.cached(api.league_id).best(query, kind="player")
+    except Exception as e:
+        logging.warning(f"Player lookup failed for {query}: {e}")
+        return query
+    return entry["name"] if entry else query
+
+def search_player_news(query: str):
+    return search_resolved_player_news(resolve_player(query))
+
+@cached_tool()
+def search_resolved_player_news(query: str):
+    return search_client().invoke({"query": query + " Performance in last game"})
+
+@cached_tool()
+def search_game_scores(query: str):
+    return search_client().invoke({"query": query})
+
+@cached_tool(team_scope)
+def project_standings():
+    # Simulated from the standings plus every active lineup's per-game pace, cached per snapshot
+    import projection
+    api = current_api()
+    standings = utils.fetch_standings(api, raise_errors=True)
+    result = projection.for_league(api, standings, st.secrets.get("projection_sims", 2000))
+    if result is None:
+        return ToolError("Not enough standings data to project the season.")
+    probs = result["rank_probs"]
+    table = result["expected_rank"].round(1).rename("expected_rank").to_frame().assign(
+        p_first=probs[1].round(2), p_top3=probs.loc[:, :3].sum(axis=1).round(2))
+    marginal = result["marginal"].loc[[name for name in result["teams"] if name.lower() == session_value('selected_team_name').lower()]]
+    return "\n".join([
+        projection.summary(result, session_value('selected_team_name')) or "",
+        prompt_context.encode_frame(table.rename_axis("team").reset_index())[0],
+        "Roto points gained per step of each category for your team:",
+        prompt_context.encode_frame(marginal.round(2).rename_axis("team").reset_index())[0],
+    ])
+
+def fetch_stat_trend(name: str, stat: str, days: int = 30):
+    # Answered from local snapshots, no Fantrax call
+    import history
+    store = history.get_store(st.secrets.get("history_dir", "history"))
+    for kind in ("roster", "standings"):
+        trend = store.trend(session_value('league_id'), kind, name, stat, days)
+        if trend is not None and not trend.empty:
+            return prompt_context.encode_frame(trend)[0]
+    return f"No recorded history for {name} {stat} in the last {days} days."
+
+def tool_timeout():
+    return st.secrets.get("tool_timeout", 20)
+
+# Tool calls run here rather than on asyncio's default executor, so calls abandoned after a timeout can't pile up
+_tool_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="agent-tool")
+
+def guarded(fn, name):
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        # Worker threads have no script context, so failures come back to the agent as the observation
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            logging.warning(f"Tool {name} failed: {e}")
+            return ToolError(f"{name} failed: {e}")
+        return ToolError(f"{name} returned no data, try again shortly.") if result is None else result
+    return run
+
+def async_tool(fn, name):
+    @functools.wraps(fn)
+    async def run(*args, **kwargs):
+        # A slow upstream costs one observation, not the whole step
+        timeout = tool_timeout()
+        context = contextvars.copy_context()
+        future = _tool_pool.submit(context.run, functools.partial(fn, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # A thread can't be interrupted; a queued call is dropped, a running one finishes in the background
+            # (cached tools still store its result for the next ask)
+            future.cancel()
+            logging.warning(f"Tool {name} timed out after {timeout}s")
+            return ToolError(f"{name} timed out after {timeout}s, answer without it.")
+    return run
+
+def tool(fn, name, description):
+    traced = guarded(telemetry.traced(f"tool.{name}")(fn), name)
+    return StructuredTool.from_function(traced, name=name, description=description, coroutine=async_tool(traced, name))
+
+def build_tools():
+    return [
+        tool(search_player_news, name="Search Player News", description="Search for recent player information and performance, pass a string whose value is the player name"),
+        tool(fetch_league_standings, name="Fetch League Standings", description="Fetch the league standings, returns a pipe-separated table with columns 'team', 'rank', and other stats. The 'is_my_team' column is a boolean indicating if the team is the user's team"),
+        tool(fetch_user_team_roster, name="Fetch User's Team Roster", description="Get the roster of the user's team"),
+        tool(fetch_user_team_name, name="Fetch User's Team Name", description="Get the name of the user's team"),
+        tool(fetch_current_free_agents, name="Fetch Free Agents", description="Get a list of top available free agents for a given position, pass a string whose value is one of 'F', 'D' or 'G' and optionally the minimum games played"),
+        tool(fetch_opposing_team_roster, name="Fetch Opposing Team Roster", description="Get the roster of an opposing team for potential trades, pass a string whose value is an opposing team name"),
+        tool(search_game_scores, name="Search Game Scores", description="Search for recent game scores of a given team, pass a string whose value is the team name"),
+        tool(project_standings, name="Project Standings", description="Simulate the rest of the season: each team's projected finish, chance of first and top 3, and how many roto points a small gain in each category is worth to the user's team"),
+        tool(fetch_stat_trend, name="Fetch Stat Trend", description="Get how a stat has moved over time for a player or a fantasy team, pass the exact player or team name, the stat column (e.g. 'SV%', 'G') and optionally the number of days to look back")
+    ]
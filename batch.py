@@ -0,0 +1,178 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import fantrax_cache
+import fantrax_session
+import llm_cache
+import recommendations
+import settings
+import transport
+
+# Nightly, non-UI recommendations for every whitelisted league:
+#   FANTRAX_USERNAME=... FANTRAX_PASSWORD=... python batch.py --output reports
+# gemini_key comes from secrets, or GEMINI_API_KEY when the batch host has no secrets file.
+# Each league writes <output>/<run id>/<league id>/{recommendation.md,candidates.json,done.json}; rerunning the
+# same run id skips finished leagues and reuses a recommendation already on disk.
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - start, 3)
+
+def write_file(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_json(path, data):
+    write_file(path, json.dumps(data, indent=2, default=str))
+
+def llm_generator(cfg):
+    # Same model, temperature and response cache as the Home page, so a batch run warms the app and vice versa
+    timeout = cfg.get("llm_timeout", 60)
+    chat_model = transport.chat_model("Gemini", recommendations.LLM_MODEL, cfg["gemini_key"], timeout, recommendations.LLM_TEMPERATURE)
+    hedge_cfg = dict(cfg.get("llm_hedge", {}))
+    hedge = None
+    if hedge_cfg.get("provider"):
+        hedge = transport.chat_model(hedge_cfg["provider"], hedge_cfg["model"], hedge_cfg["api_key"], timeout, recommendations.LLM_TEMPERATURE)
+    response_cache = llm_cache.get_cache(cfg.get("llm_cache_path", "llm_cache.sqlite3"))
+
+    def generate(prompt, ttl):
+        key = llm_cache.cache_key(prompt, recommendations.LLM_MODEL, recommendations.LLM_TEMPERATURE)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+        response = transport.hedged("llm.gemini", lambda: chat_model.invoke(prompt),
+                                    (lambda: hedge.invoke(prompt)) if hedge is not None else None,
+                                    percentile=cfg.get("llm_hedge_percentile", 0.95))
+        content = response.content if response else None
+        if content:
+            response_cache.set(key, content, ttl, model=recommendations.LLM_MODEL)
+        return content
+    return generate
+
+def run_league(league_id, session, run_dir, cfg, generate, force=False):
+    import utils
+
+    league_dir = os.path.join(run_dir, str(league_id))
+    done_path = os.path.join(league_dir, "done.json")
+    if os.path.exists(done_path) and not force:
+        with open(done_path) as f:
+            return {**json.load(f), "status": "skipped"}
+    os.makedirs(league_dir, exist_ok=True)
+
+    timer = StageTimer()
+    start = time.perf_counter()
+    with timer.stage("client"):
+        api = fantrax_session.api_for(league_id, session)
+        team_id, team_name = api.default_team_id, api.default_team_name
+    with timer.stage("standings"):
+        standings_df = utils.fetch_standings(api, raise_errors=True)
+    with timer.stage("roster"):
+        roster_df = utils.fetch_team_roster(api, team_id, raise_errors=True)
+    if standings_df is None or roster_df is None:
+        raise RuntimeError(f"Could not load standings and roster for league {league_id}")
+
+    with timer.stage("prompt"):
+        prompt, prompt_data = recommendations.recommendation_prompt(
+            api, team_name, roster_df, standings_df, cfg.get("prompt_token_budget", 3000), cfg.get("projection_sims", 2000))
+
+    recommendation_path = os.path.join(league_dir, "recommendation.md")
+    with timer.stage("recommendation"):
+        if os.path.exists(recommendation_path) and not force:
+            with open(recommendation_path) as f:
+                recommendation = f.read()
+        else:
+            recommendation = generate(prompt, cfg.get("llm_cache_ttl", fantrax_cache.ttl_for("standings")))
+            if not recommendation:
+                raise RuntimeError(f"No recommendation returned for league {league_id}")
+            write_file(recommendation_path, recommendation)
+
+    with timer.stage("free_agents"):
+        shortlists = {}
+        evaluations = recommendations.evaluate_free_agents(
+            api,
+            {"recommendation": recommendation},
+            standings_df,
+            team_name,
+            lambda prompt: generate(prompt, fantrax_cache.ttl_for("get_available_players")),
+            k=cfg.get("eval_shortlist", 3),
+            max_workers=cfg.get("eval_concurrency", 4),
+            batch_size=cfg.get("eval_batch_size", 1),
+            shortlists=shortlists,
+        )
+        write_json(os.path.join(league_dir, "candidates.json"), {"team": team_name, "shortlists": shortlists, "evaluations": evaluations})
+
+    result = {
+        "league_id": league_id,
+        "team": team_name,
+        "status": "done",
+        "prompt_tokens": prompt_data["tokens"],
+        "stages": timer.stages,
+        "total_s": round(time.perf_counter() - start, 3),
+        "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    write_json(done_path, result)
+    return result
+
+def main(argv=None):
+    cfg = settings.secrets()
+    parser = argparse.ArgumentParser(description="Write recommendations and candidate free agents for every whitelisted league")
+    parser.add_argument("--output", default="reports")
+    parser.add_argument("--run-id", default=datetime.date.today().isoformat(), help="Reuse a run id to resume it (default: today)")
+    parser.add_argument("--leagues", nargs="*", default=None, help="Defaults to league_whitelist from secrets")
+    parser.add_argument("--concurrency", type=int, default=cfg.get("batch_concurrency", 2), help="Leagues processed at once")
+    parser.add_argument("--force", action="store_true", help="Redo leagues already finished in this run")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+    leagues = args.leagues if args.leagues is not None else list(cfg.get("league_whitelist", []))
+    if not leagues:
+        parser.error("no leagues given and league_whitelist is empty")
+    cfg["gemini_key"] = cfg.get("gemini_key") or os.environ.get("GEMINI_API_KEY")
+    if not cfg["gemini_key"]:
+        parser.error("no Gemini key: set gemini_key in secrets or GEMINI_API_KEY")
+    missing = [name for name in ("FANTRAX_USERNAME", "FANTRAX_PASSWORD") if not os.environ.get(name)]
+    if missing:
+        parser.error(f"{' and '.join(missing)} must be set")
+    run_dir = os.path.join(args.output, args.run_id)
+    os.makedirs(run_dir, exist_ok=True)
+
+    # One login covers every league on the account; the stored session is reused across nights
+    start = time.perf_counter()
+    store = fantrax_session.SessionStore(cfg.get("session_store_dir", ".sessions"), cfg.get("session_store_key"))
+    session, _ = fantrax_session.login(os.environ["FANTRAX_USERNAME"], os.environ["FANTRAX_PASSWORD"], store, fantrax_session.get_pool(1))
+    login_s = round(time.perf_counter() - start, 3)
+    generate = llm_generator(cfg)
+
+    # Leagues are network-bound, so threads are enough and share the Fantrax, LLM and connection caches
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {pool.submit(run_league, league_id, session, run_dir, cfg, generate, args.force): league_id for league_id in leagues}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                logging.error(f"League {futures[future]} failed: {e}")
+                result = {"league_id": futures[future], "status": "failed", "error": repr(e)}
+            print(json.dumps({**result, "login_s": login_s}), flush=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
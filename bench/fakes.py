@@ -0,0 +1,96 @@
+import hashlib
+import time
+from types import SimpleNamespace
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+RECOMMENDATION = (
+    "Current Situation: the team sits mid-table. Areas that need improvement include goals and save percentage. "
+    "Recommendations: add a scoring forward and a steadier goalie."
+)
+
+def _fits(prompt):
+    return int(hashlib.sha1(prompt.encode()).hexdigest(), 16) % 3 == 0
+
+def fake_response(prompt):
+    if "evaluate if" in prompt:
+        verdict = "is a good fit" if _fits(prompt) else "is a not good fit"
+        return f"- **Candidate** {verdict} for F: stats line up with team needs."
+    return RECOMMENDATION
+
+class FakeChatModel:
+    # Stands in for ChatGoogleGenerativeAI: deterministic text after a fixed latency
+    latency = 0.0
+    chunk_delay = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self.model = kwargs.get("model")
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        return SimpleNamespace(content=fake_response(prompt))
+
+    def stream(self, prompt):
+        time.sleep(self.latency)
+        text = fake_response(prompt)
+        for i in range(0, len(text), 8):
+            time.sleep(self.chunk_delay)
+            yield SimpleNamespace(content=text[i:i + 8])
+
+def fake_chat_model_class(latency=0.0, chunk_delay=0.0):
+    return type("FakeChatModel", (FakeChatModel,), {"latency": latency, "chunk_delay": chunk_delay})
+
+class SlowFakeListChatModel(FakeListChatModel):
+    latency: float = 0.0
+
+    def _call(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super()._call(*args, **kwargs)
+
+def fake_agent_llm(latency=0.0):
+    # One step with independent tool calls dispatched together, then the answer
+    actions = ('```\n[{"action": "Fetch User\'s Team Roster", "action_input": {}},\n'
+               ' {"action": "Fetch Free Agents", "action_input": {"position": "D"}},\n'
+               ' {"action": "Search Game Scores", "action_input": {"query": "Toronto Maple Leafs"}}]\n```')
+    answer = '```\n{"action": "Final Answer", "action_input": "Get pucks in deep and grab a goalie."}\n```'
+    return SlowFakeListChatModel(responses=[actions, answer], latency=latency)
+
+class FakeGenerativeModel:
+    # Mirrors the google.generativeai chat surface used by the chat page
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def start_chat(self, history=None):
+        return FakeChat(list(history or []), self.latency)
+
+class FakeChat:
+    def __init__(self, history, latency):
+        self.history = history
+        self.latency = latency
+
+    def send_message(self, prompt, stream=False, **kwargs):
+        time.sleep(self.latency)
+        text = "We gotta set the tone! Your goalies need to stop the puck."
+        self.history.append(SimpleNamespace(role="user", parts=[SimpleNamespace(text=prompt)]))
+        self.history.append(SimpleNamespace(role="model", parts=[SimpleNamespace(text=text)]))
+        return [SimpleNamespace(text=text[i:i + 8]) for i in range(0, len(text), 8)]
+
+def fake_generative_model_class(latency=0.0):
+    return type("FakeGenerativeModel", (FakeGenerativeModel,), {"latency": latency})
+
+class FakeSearch:
+    # Stands in for TavilySearchResults
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def invoke(self, payload):
+        time.sleep(self.latency)
+        query = payload["query"] if isinstance(payload, dict) else payload
+        return [{"url": "https://example.com/recap", "content": f"Recap for {query}: 4-2 final."}]
+
+def fake_search_class(latency=0.0):
+    return type("FakeSearch", (FakeSearch,), {"latency": latency})
@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import random
+from types import SimpleNamespace
+
+SKATER_STATS = ['G', 'A', '+/-', 'PIM', 'PPP', 'SOG', 'HIT', 'BLK']
+GOALIE_STATS = ['W', 'GAA', 'SV%', 'SHO']
+POSITIONS = ['C', 'LW', 'RW', 'D', 'G']
+
+# *** RECORDING ***
+def _players_to_json(players):
+    return [
+        {
+            "pos": row.pos.name,
+            "player": {"name": row.player.name, "team_short_name": row.player.team_short_name} if row.player else None,
+            "latest_comment": row.latest_comment,
+            "stats": dict(row.stats),
+        }
+        for row in players.rows
+    ]
+
+def _standings_to_json(standings_collection):
+    return [
+        {
+            caption: [{"team": str(record.team), "rank": record.rank, "data": dict(record.data)} for record in standings.team_records]
+            for caption, standings in section.items()
+        }
+        for section in standings_collection.standings
+    ]
+
+def record_league(api, path, positions=('F', 'D', 'G')):
+    rosters = {}
+    for team in api.teams:
+        roster = api.roster_info(team.team_id)
+        rosters[team.team_id] = {
+            "team": team.name,
+            "active": roster.active, "reserve": roster.reserve, "injured": roster.injured, "max": roster.max,
+            "rows": _players_to_json(roster),
+        }
+    fixture = {
+        "league_id": api.league_id,
+        "default_team_id": api.default_team_id,
+        "default_team_name": api.default_team_name,
+        "teams": [{"team_id": team.team_id, "name": team.name} for team in api.teams],
+        "standings": _standings_to_json(api.standings()),
+        "rosters": rosters,
+        "available_players": {position: _players_to_json(api.get_available_players(position)) for position in positions},
+    }
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+    return fixture
+
+# *** SYNTHETIC LEAGUES ***
+def _stat_line(rng, position):
+    if position == 'G':
+        return {"GP": str(rng.randint(5, 40)), "W": str(rng.randint(0, 25)), "GAA": f"{rng.uniform(2.0, 3.8):.2f}",
+                "SV%": f"{rng.uniform(0.880, 0.930):.3f}", "SHO": str(rng.randint(0, 5)), "RkOv": str(rng.randint(1, 900))}
+    stats = {"GP": str(rng.randint(5, 60))}
+    stats.update({stat: str(rng.randint(-10 if stat == '+/-' else 0, 120)) for stat in SKATER_STATS})
+    stats["RkOv"] = str(rng.randint(1, 900))
+    return stats
+
+def _player_rows(rng, n, prefix):
+    rows = []
+    for i in range(n):
+        position = POSITIONS[i % len(POSITIONS)]
+        rows.append({
+            "pos": position,
+            "player": {"name": f"{prefix} Player {i}", "team_short_name": rng.choice(['BOS', 'TOR', 'EDM', 'COL', 'NYR'])},
+            "latest_comment": rng.choice([None, "Scored twice in a win.", "Day-to-day with a lower-body injury."]),
+            "stats": _stat_line(rng, position),
+        })
+    return rows
+
+def synthetic_league(n_teams=12, roster_size=26, pool_size=300, seed=7, sorted_pool=False):
+    rng = random.Random(seed)
+    teams = [{"team_id": f"t{i}", "name": f"Team {i}"} for i in range(n_teams)]
+    categories = SKATER_STATS + GOALIE_STATS
+    records = []
+    for i, team in enumerate(teams):
+        data = {stat: str(rng.randint(50, 900)) for stat in SKATER_STATS}
+        data.update({"W": str(rng.randint(10, 60)), "GAA": f"{rng.uniform(2.2, 3.4):.2f}",
+                     "SV%": f"{rng.uniform(0.890, 0.925):.3f}", "SHO": str(rng.randint(0, 8))})
+        data["Pts"] = str(rng.randint(20, 12 * len(categories)))
+        records.append({"team": team["name"], "rank": i + 1, "data": data})
+    return {
+        "league_id": "synthetic",
+        "default_team_id": teams[0]["team_id"],
+        "default_team_name": teams[0]["name"],
+        "teams": teams,
+        "standings": [{"Season Stats": records}],
+        "rosters": {
+            team["team_id"]: {"team": team["name"], "active": 20, "reserve": 4, "injured": 2, "max": roster_size,
+                              "rows": _player_rows(rng, roster_size, team["name"])}
+            for team in teams
+        },
+        # Served in pages of page_size; unordered by default so top-k can't rely on the pool arriving by rank
+        "available_players": {position: sorted(_player_rows(rng, pool_size, f"FA {position}"),
+                                               key=lambda row: int(row["stats"]["RkOv"]) if sorted_pool else 0)
+                              for position in ['F', 'D', 'G']},
+        "page_size": 50,
+    }
+
+def load_fixture(path=None, **synthetic_args):
+    if path:
+        with open(path) as f:
+            return json.load(f)
+    return synthetic_league(**synthetic_args)
+
+# *** FAKE API ***
+def _players(rows, **extra):
+    return SimpleNamespace(
+        rows=[
+            SimpleNamespace(
+                pos=SimpleNamespace(name=row["pos"]),
+                player=SimpleNamespace(**row["player"]) if row["player"] else None,
+                latest_comment=row["latest_comment"],
+                stats=row["stats"],
+            )
+            for row in rows
+        ],
+        **extra,
+    )
+
+class FakeFantraxAPI:
+    # Replays a recorded or synthetic fixture through the FantraxAPI calls the app uses
+    fixture = None
+
+    def __init__(self, league_id=None, session=None):
+        fixture = self.fixture
+        self.league_id = league_id or fixture["league_id"]
+        self.session = session
+        self.default_team_id = fixture["default_team_id"]
+        self.default_team_name = fixture["default_team_name"]
+        self.teams = [SimpleNamespace(**team) for team in fixture["teams"]]
+
+    def standings(self):
+        sections = [
+            {caption: SimpleNamespace(team_records=[SimpleNamespace(**record) for record in records])
+             for caption, records in section.items()}
+            for section in self.fixture["standings"]
+        ]
+        return SimpleNamespace(standings=sections)
+
+    def roster_info(self, team_id):
+        roster = self.fixture["rosters"][team_id]
+        return _players(roster["rows"], team=SimpleNamespace(name=roster["team"]), active=roster["active"],
+                        reserve=roster["reserve"], injured=roster["injured"], max=roster["max"])
+
+    def get_available_players(self, position, page=1):
+        rows = self.fixture["available_players"].get(position, [])
+        size = self.fixture.get("page_size", 50)
+        return _players(rows[(page - 1) * size:page * size])
+
+def fake_api_class(fixture):
+    return type("FakeFantraxAPI", (FakeFantraxAPI,), {"fixture": fixture})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record a live Fantrax league into a benchmark fixture")
+    parser.add_argument("output")
+    args = parser.parse_args()
+
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import fantrax_session
+    from fantraxapi import FantraxAPI
+
+    store = fantrax_session.SessionStore()
+    session, league_id = fantrax_session.login(os.environ["FANTRAX_USERNAME"], os.environ["FANTRAX_PASSWORD"], store, fantrax_session.get_pool(1))
+    record_league(FantraxAPI(league_id, session=session), args.output)
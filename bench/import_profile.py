@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each entry point imports up front, versus heavy modules that should now load on demand
+PROFILES = {
+    "home.logged_out": ["streamlit", "fantrax_cache", "fantrax_session", "llm_cache", "streaming", "telemetry", "prefetch"],
+    "home.logged_in": ["fantraxapi", "utils", "evaluation", "scoring", "prompt_context"],
+    "agent.page": ["fantraxapi", "utils", "agent_tools"],
+    "chat.page": ["google.generativeai", "fantraxapi", "utils", "prompt_context", "streaming"],
+    "lazy.selenium": ["selenium.webdriver"],
+    "lazy.gemini": ["langchain_google_genai"],
+    "lazy.groq": ["langchain_groq"],
+    "lazy.openai": ["langchain_openai"],
+    "lazy.ollama": ["ollama", "langchain_ollama"],
+    "lazy.agents": ["langchain.agents", "parallel_agent"],
+    "lazy.tavily": ["langchain_community.tools"],
+    "lazy.pyarrow": ["pyarrow.dataset"],
+    "lazy.history": ["utils", "history"],
+}
+
+def profile(modules):
+    # Each profile runs in a fresh interpreter so nothing is already cached in sys.modules
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({"module": name.strip(), "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                        "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    top_level = [entry for entry in entries if entry["depth"] == 0]
+    return {
+        "ok": result.returncode == 0,
+        "error": result.stderr.strip().splitlines()[-1] if result.returncode else None,
+        "total_ms": round(sum(entry["cumulative_us"] for entry in top_level) / 1000, 3),
+        "slowest": sorted(entries, key=lambda entry: entry["self_us"], reverse=True)[:10],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time profile of each entry point and lazily loaded dependency")
+    parser.add_argument("profiles", nargs="*", default=list(PROFILES), help=f"Any of: {', '.join(PROFILES)}")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for name in args.profiles:
+            out.write(json.dumps({"profile": name, "modules": PROFILES[name], **profile(PROFILES[name])}) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+if __name__ == "__main__":
+    main()
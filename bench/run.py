@@ -0,0 +1,169 @@
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench import fakes, fixtures
+
+def timed(name, fn, repeat=5, **meta):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "name": name,
+        "repeat": repeat,
+        "mean_ms": round(statistics.mean(durations), 3),
+        "p50_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[min(len(durations) - 1, int(0.95 * len(durations)))], 3),
+        "min_ms": round(durations[0], 3),
+        "max_ms": round(durations[-1], 3),
+        **meta,
+    }
+
+def patched_providers(stack, fixture, llm_latency, search_latency):
+    import agent_tools
+    api_class = fixtures.fake_api_class(fixture)
+    stack.enter_context(mock.patch("fantraxapi.FantraxAPI", api_class))
+    stack.enter_context(mock.patch("langchain_community.tools.TavilySearchResults", fakes.fake_search_class(search_latency)))
+    stack.enter_context(mock.patch("agent_tools.load_chat_prompt", lambda *args, **kwargs: agent_tools.fallback_chat_prompt()))
+    stack.enter_context(mock.patch("langchain_google_genai.ChatGoogleGenerativeAI", fakes.fake_chat_model_class(llm_latency)))
+    stack.enter_context(mock.patch("langchain_groq.ChatGroq", lambda *args, **kwargs: fakes.fake_agent_llm(llm_latency)))
+    stack.enter_context(mock.patch("google.generativeai.GenerativeModel", fakes.fake_generative_model_class(llm_latency)))
+    stack.enter_context(mock.patch("google.generativeai.configure", lambda *args, **kwargs: None))
+    return api_class
+
+def core_benchmarks(fixture, api_class, args):
+    import evaluation
+    import fantrax_cache
+    import prompt_context
+    import scoring
+    import utils
+
+    api = api_class()
+    rosters = [api.roster_info(team.team_id) for team in api.teams]
+    pools = [api.get_available_players(position) for position in ['F', 'D', 'G']]
+    standings_collection = api.standings()
+    standings_df = utils.standings_to_dataframe(standings_collection)
+    roster_df = utils.playerstats_to_dataframe(rosters[0])
+    n_rows = sum(len(players.rows) for players in rosters + pools)
+
+    results = [
+        timed("playerstats_to_dataframe", lambda: [utils.playerstats_to_dataframe(players) for players in rosters + pools],
+              args.repeat, rows=n_rows),
+        timed("standings_to_dataframe", lambda: utils.standings_to_dataframe(standings_collection), args.repeat,
+              teams=len(api.teams)),
+        timed("prompt_context.encode_context", lambda: prompt_context.encode_context(roster_df, standings_df, 3000),
+              args.repeat, tokens=prompt_context.encode_context(roster_df, standings_df, 3000)["tokens"]),
+    ]
+
+    chat_model = fakes.fake_chat_model_class(args.llm_latency)()
+
+    def evaluate():
+        fantrax_cache.invalidate()
+        evaluation.run_player_evaluation(
+            api,
+            {"recommendation": fakes.RECOMMENDATION},
+            lambda prompt: chat_model.invoke(prompt).content,
+            max_workers=args.eval_concurrency,
+            fetch_fn=lambda api, position: scoring.shortlist(api, position, standings_df, api.default_team_name),
+        )
+
+    results.append(timed("run_player_evaluation", evaluate, args.repeat,
+                         llm_latency_ms=args.llm_latency * 1000, concurrency=args.eval_concurrency))
+    return results
+
+def page_benchmarks(fixture, api_class, args):
+    from streamlit.testing.v1 import AppTest
+    import fantrax_cache
+
+    bench_dir = tempfile.mkdtemp(prefix="bench-")
+    llm_cache_path = os.path.join(bench_dir, "llm_cache.sqlite3")
+    secrets = {
+        "league_whitelist": [fixture["league_id"]],
+        "gemini_key": "bench", "groq_api_key": "bench", "tavily_key": "bench",
+        "langsmith_key": "bench", "langsmith_project": "bench",
+        "llm_cache_path": llm_cache_path,
+    }
+    api = api_class()
+    session = {
+        "logged_in": True, "username": "bench", "league_id": fixture["league_id"], "session": None,
+        "selected_team_name": api.default_team_name, "selected_team_id": api.default_team_id,
+        "roster": api.roster_info(api.default_team_id),
+    }
+
+    cold_runs = itertools.count()
+
+    def run_page(script, chat=None, cold=False):
+        if cold:
+            # A new file per cold run: llm_cache keeps its connections per path, so deleting the file in place would
+            # either leave a table-less database behind or keep serving the old rows
+            fantrax_cache.invalidate()
+            secrets["llm_cache_path"] = os.path.join(bench_dir, f"llm_cache-{next(cold_runs)}.sqlite3")
+        at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=args.timeout)
+        for key, value in secrets.items():
+            at.secrets[key] = value
+        for key, value in session.items():
+            at.session_state[key] = value
+        at.run()
+        # Checked before the chat turn too: a page that raised has no chat input to type into
+        check(at, script)
+        if chat:
+            at.chat_input[0].set_value(chat).run()
+            check(at, script)
+
+    def check(at, script):
+        if at.exception:
+            raise RuntimeError(f"{script} raised: {at.exception[0].value}")
+
+    repeat = max(1, args.repeat // 2)
+    return [
+        timed("page.Home.cold", lambda: run_page("Home.py", cold=True), repeat),
+        timed("page.Home.warm", lambda: run_page("Home.py"), repeat),
+        timed("page.Chat_With_Yer_Team.turn", lambda: run_page("pages/Chat_With_Yer_Team.py", chat="How are my goalies?"), repeat),
+        timed("page.Chat_With_Yer_Team-Agent.turn", lambda: run_page("pages/Chat_With_Yer_Team-Agent.py", chat="Who should I pick up?"), repeat),
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against recorded Fantrax fixtures and fake LLM/search providers")
+    parser.add_argument("--fixture", help="Recorded fixture JSON (see bench/fixtures.py); a synthetic league is used when omitted")
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--pool-size", type=int, default=300)
+    parser.add_argument("--sorted-pool", action="store_true", help="Serve the synthetic free-agent pool ordered by RkOv, as Fantrax usually does")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per fake LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per fake search call")
+    parser.add_argument("--eval-concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--skip-pages", action="store_true")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    fixture = fixtures.load_fixture(args.fixture, n_teams=args.teams, pool_size=args.pool_size, sorted_pool=args.sorted_pool)
+    with ExitStack() as stack:
+        api_class = patched_providers(stack, fixture, args.llm_latency, args.search_latency)
+        results = core_benchmarks(fixture, api_class, args)
+        if not args.skip_pages:
+            results += page_benchmarks(fixture, api_class, args)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+if __name__ == "__main__":
+    main()
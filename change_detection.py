@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Row fingerprints for the inputs of an analysis, so a rerun only pays for the LLM when something that matters moved.
+# Roster rows are keyed by slot as well as player, so moving a player to IR or the bench shows up as a change.
+KEY_COLUMNS = {"roster": ["Player", "Position"], "standings": ["team"], "free_agents": ["Player"]}
+IGNORED_COLUMNS = {'Latest', 'Analysis'}
+
+def row_keys(df, key_columns):
+    # Readable keys; rows that share one (empty 'N/A' slots, a player listed twice) are numbered by occurrence
+    keys = df[key_columns].astype(str).agg(" / ".join, axis=1)
+    occurrence = keys.groupby(keys, sort=False).cumcount()
+    return [key if n == 0 else f"{key} #{n + 1}" for key, n in zip(keys, occurrence)]
+
+def fingerprints(df, key_columns):
+    if df is None or df.empty or not set(key_columns) <= set(df.columns):
+        return {}
+    # News text is rewritten constantly and never changes a recommendation by itself
+    hashed = pd.util.hash_pandas_object(df.drop(columns=[c for c in IGNORED_COLUMNS if c in df]).astype(str), index=False)
+    return dict(zip(row_keys(df, key_columns), hashed.to_numpy().tolist()))
+
+def snapshot(roster_df, standings_df, shortlists=None):
+    # Free agents are fingerprinted by position shortlist, the only rows the evaluation pass ever sees
+    tables = {"roster": roster_df, "standings": standings_df}
+    for position, players in (shortlists or {}).items():
+        tables[f"free_agents.{position}"] = pd.DataFrame(players or [])
+    return {name: {"rows": fingerprints(df, KEY_COLUMNS[name.split('.')[0]]), "frame": df} for name, df in tables.items()}
+
+def row_moves(old_df, new_df, key_columns, keys, tolerance):
+    # For each changed key: numeric columns that moved by more than tolerance (relative), and text columns
+    # (status, NHL team) whose value changed at all
+    moves, edits = {}, {}
+    old = old_df.set_axis(row_keys(old_df, key_columns))
+    new = new_df.set_axis(row_keys(new_df, key_columns))
+    columns = [column for column in new.columns
+               if column in old.columns and column not in key_columns and column not in IGNORED_COLUMNS]
+    for k in keys:
+        if k not in old.index or k not in new.index:
+            continue
+        before_raw, after_raw = old.loc[k, columns], new.loc[k, columns]
+        before = pd.to_numeric(before_raw, errors='coerce').to_numpy(dtype=float)
+        after = pd.to_numeric(after_raw, errors='coerce').to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            relative = np.abs(after - before) / np.maximum(np.abs(before), 1.0)
+        moved = [(column, before[i], after[i]) for i, column in enumerate(columns) if relative[i] > tolerance]
+        edited = [(column, str(before_raw[column]), str(after_raw[column])) for i, column in enumerate(columns)
+                  if (np.isnan(before[i]) or np.isnan(after[i])) and str(before_raw[column]) != str(after_raw[column])]
+        if moved:
+            moves[k] = moved
+        if edited:
+            edits[k] = edited
+    return moves, edits
+
+def diff(old, new, tolerance=0.05):
+    changes = {}
+    for name, table in new.items():
+        previous = old.get(name, {"rows": {}, "frame": None})
+        added = sorted(set(table["rows"]) - set(previous["rows"]))
+        removed = sorted(set(previous["rows"]) - set(table["rows"]))
+        changed = sorted(k for k in set(table["rows"]) & set(previous["rows"]) if table["rows"][k] != previous["rows"][k])
+        moves, edits = {}, {}
+        if changed and previous["frame"] is not None:
+            moves, edits = row_moves(previous["frame"], table["frame"], KEY_COLUMNS[name.split('.')[0]], changed, tolerance)
+        changes[name] = {"added": added, "removed": removed, "changed": changed, "moves": moves, "edits": edits}
+    return changes
+
+def score(changes):
+    # Roster moves, status changes and standings rank changes count fully, other material stat moves count half
+    total = 0.0
+    for name, change in changes.items():
+        if name.startswith("free_agents"):
+            continue
+        total += len(change["added"]) + len(change["removed"])
+        for key in set(change["moves"]) | set(change["edits"]):
+            moved = change["moves"].get(key, [])
+            total += 1.0 if key in change["edits"] or any(column == 'rank' for column, _, _ in moved) else 0.5
+    return total
+
+def is_material(changes, threshold=1.0):
+    return score(changes) >= threshold
+
+def changed_positions(changes):
+    # A new or departed name near the top of a pool is worth re-evaluating; stat drift alone is not
+    return [name.split('.', 1)[1] for name, change in changes.items()
+            if name.startswith("free_agents.") and (change["added"] or change["removed"])]
+
+def describe(changes, limit=8):
+    lines = []
+    for name, change in changes.items():
+        label = name.replace("free_agents.", "Free agents ").replace("roster", "Roster").replace("standings", "Standings")
+        if change["added"]:
+            lines.append(f"{label}: new {', '.join(change['added'][:limit])}")
+        if change["removed"]:
+            lines.append(f"{label}: gone {', '.join(change['removed'][:limit])}")
+        for key in sorted(set(change["moves"]) | set(change["edits"]))[:limit]:
+            details = [f"{column} {before}→{after}" for column, before, after in change["edits"].get(key, [])]
+            details += [f"{column} {before:g}→{after:g}" for column, before, after in change["moves"].get(key, [])]
+            lines.append(f"{label}: {key} ({', '.join(details[:4])})")
+    return lines
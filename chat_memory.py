@@ -0,0 +1,62 @@
+import logging
+
+import prompt_context
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a fantasy hockey GM (user) and their coach.
+Keep names, stats, decisions and open questions; drop banter. Reply with the updated summary only, under 120 words.
+Summary so far:
+{summary}
+New messages:
+{messages}"""
+
+class ChatMemory:
+    # Keeps the last max_turns exchanges verbatim and folds anything older into a rolling summary
+    def __init__(self, max_turns=6, max_tokens=1500):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.messages = []
+        self.summary = ""
+
+    def append(self, role, content):
+        self.messages.append({"role": role, "content": content})
+
+    def clear(self):
+        self.messages = []
+        self.summary = ""
+
+    def tokens(self):
+        return prompt_context.estimate_tokens(self.summary) + sum(prompt_context.estimate_tokens(m["content"]) for m in self.messages)
+
+    def compact(self, summarize_fn):
+        overflow = []
+        while self.messages and (len(self.messages) > self.max_turns * 2 or (self.tokens() > self.max_tokens and len(self.messages) > 2)):
+            overflow.append(self.messages.pop(0))
+        if not overflow:
+            return 0
+
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in overflow)
+        try:
+            summary = summarize_fn(SUMMARY_PROMPT.format(summary=self.summary or "(none)", messages=transcript))
+            self.summary = str(getattr(summary, "content", summary)).strip() or self.summary
+        except Exception as e:
+            # Never lose the turns outright; keep a clipped transcript until the next successful summary
+            logging.warning(f"Chat summary failed, keeping clipped transcript: {e}")
+            self.summary = (self.summary + "\n" + transcript)[-self.max_tokens * prompt_context.CHARS_PER_TOKEN // 2:]
+        return len(overflow)
+
+    def history(self, summary_role="system"):
+        history = []
+        if self.summary:
+            history.append({"role": summary_role, "content": f"Summary of the earlier conversation: {self.summary}"})
+        return history + list(self.messages)
+
+    def report(self, fixed_tokens=0):
+        return {
+            "prompt_tokens": fixed_tokens + self.tokens(),
+            "summary_tokens": prompt_context.estimate_tokens(self.summary),
+            "recent_messages": len(self.messages),
+        }
+
+def format_report(report):
+    return (f"Prompt ~{report['prompt_tokens']} tokens "
+            f"(summary ~{report['summary_tokens']}, {report['recent_messages']} recent messages)")
@@ -0,0 +1 @@
+# Lets pytest import the app's flat modules from the repository root
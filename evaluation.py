@@ -0,0 +1,104 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import telemetry
+import utils
+
+POSITIONS = ['F', 'D', 'G']
+
+def evaluation_prompt(player, context):
+    return f"""
+        Given the player details {player} and the context {context}, evaluate if this player is a good fit for the team.
+        If adding this player, suggest who they should replace on the current roste. Provide concise reasons using key stats. Use the following template:
+        - **[Player Name]** is a good fit for [Position]: [Reason in relation to team needs and recommendations], or
+        - **[Player Name]** is a not good fit for [Position]: [Reason in relation to team needs and recommendations]
+    """
+
+def batch_evaluation_prompt(players, context):
+    return f"""
+        Given the following players {players} and the context {context}, evaluate if each player is a good fit for the team.
+        If adding a player, suggest who they should replace on the current roste. Provide concise reasons using key stats.
+        Answer with exactly one line per player, in the order given, using the following template:
+        - **[Player Name]** is a good fit for [Position]: [Reason in relation to team needs and recommendations], or
+        - **[Player Name]** is a not good fit for [Position]: [Reason in relation to team needs and recommendations]
+    """
+
+def is_good_fit(response):
+    return 'is a good fit' in response.lower()
+
+def fetch_candidates(api, positions=POSITIONS, fetch_fn=utils.fetch_free_agents):
+    # One Fantrax call per position, all in flight at once
+    with ThreadPoolExecutor(max_workers=len(positions)) as pool:
+        futures = {position: pool.submit(telemetry.bind(fetch_fn), api, position) for position in positions}
+
+    seen = set()
+    candidates = {}
+    for position in positions:
+        try:
+            free_agents = futures[position].result() or []
+        except Exception as e:
+            logging.warning(f"Error fetching free agents for {position}: {e}")
+            free_agents = []
+
+        candidates[position] = []
+        for player in free_agents:
+            name = player.get('Player')
+            if name in seen:
+                continue
+            seen.add(name)
+            candidates[position].append(player)
+    return candidates
+
+def evaluate_chunk(llm_fn, players, context):
+    if len(players) == 1:
+        response = llm_fn(evaluation_prompt(players[0], context))
+        if response and is_good_fit(response):
+            return {"player": players[0], "evaluation": response}
+        return None
+
+    response = llm_fn(batch_evaluation_prompt(players, context))
+    if not response:
+        return None
+    for line in response.splitlines():
+        if not is_good_fit(line):
+            continue
+        for player in players:
+            if str(player.get('Player', '')).lower() in line.lower():
+                return {"player": player, "evaluation": line.strip()}
+    return None
+
+def run_player_evaluation(api, context, llm_fn, max_workers=4, batch_size=1, positions=POSITIONS, fetch_fn=utils.fetch_free_agents, errors=None):
+    # Worker threads can't render, so failed calls are appended to errors for the caller to show
+    candidates = fetch_candidates(api, positions, fetch_fn)
+    batch_size = max(1, int(batch_size))
+
+    best = {}
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+        pending = {}
+        for position in positions:
+            players = candidates[position]
+            for i in range(0, len(players), batch_size):
+                future = pool.submit(telemetry.bind(evaluate_chunk), llm_fn, players[i:i + batch_size], context)
+                pending[future] = (position, i)
+
+        for future in as_completed(list(pending)):
+            if future.cancelled():
+                continue
+            position, i = pending[future]
+            if position in best and best[position][0] < i:
+                continue
+            try:
+                evaluation = future.result()
+            except Exception as e:
+                logging.warning(f"Error evaluating {position} free agents: {e}")
+                if errors is not None:
+                    errors.append(e)
+                continue
+            if evaluation:
+                # Keep the best-ranked fit and drop the lower-ranked calls still queued for this position
+                best[position] = (i, {**evaluation, "position": position})
+                for other, (other_position, j) in pending.items():
+                    if other_position == position and j > i:
+                        other.cancel()
+
+    return [best[position][1] for position in positions if position in best]
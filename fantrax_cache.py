@@ -0,0 +1,261 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import settings
+import telemetry
+
+# Seconds each Fantrax endpoint stays fresh, overridable via the [fantrax_cache] secrets section
+DEFAULT_TTLS = {
+    "standings": 300,
+    "roster_info": 300,
+    "get_available_players": 600,
+}
+
+class PayloadPickler(pickle.Pickler):
+    # fantraxapi objects point back at their client and its HTTP session; those stay out of the file
+    def persistent_id(self, obj):
+        if any(cls.__name__ == "Session" and cls.__module__.startswith("requests") for cls in type(obj).__mro__):
+            return "session"
+        if type(obj).__name__ == "FantraxAPI":
+            return "client"
+        return None
+
+class PayloadUnpickler(pickle.Unpickler):
+    # ...and are rebound to the client of whoever reads the entry back
+    def __init__(self, f, client=None):
+        super().__init__(f)
+        self.client = client
+
+    def persistent_load(self, pid):
+        if pid == "session":
+            return getattr(self.client, "_session", None)
+        return self.client
+
+class TTLCache:
+    def __init__(self, max_entries=256, disk_dir=None, stale_ttl=0):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.RLock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._prune_disk()
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pkl")
+
+    def peek(self, key, client=None):
+        # Returns (value, stored_at, expires_at), keeping expired entries around for stale_ttl more seconds
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.disk_dir:
+                entry = self._load(key, client)
+                if entry is not None:
+                    self._entries[key] = entry
+            if entry is None:
+                return None
+            expires_at, value, stored_at = entry
+            if expires_at + self.stale_ttl < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value, stored_at, expires_at
+
+    def get(self, key, client=None):
+        entry = self.peek(key, client)
+        if entry is None or entry[2] < time.time():
+            return False, None
+        return True, entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            now = time.time()
+            entry = (now + ttl, value, now)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            if self.disk_dir:
+                self._store(key, entry)
+
+    def get_or_load(self, key, loader, ttl, client=None, cache_if=None):
+        # Concurrent misses on the same key wait for a single upstream call instead of each making one;
+        # results rejected by cache_if are handed to those waiters but not stored
+        with self._lock:
+            hit, value = self.get(key, client)
+            if hit:
+                return value
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = Future()
+        if not leader:
+            return inflight.result()
+
+        try:
+            value = loader()
+            if cache_if is None or cache_if(value):
+                self.set(key, value, ttl)
+            inflight.set_result(value)
+            return value
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def invalidate(self, match=None):
+        with self._lock:
+            keys = [key for key in self._entries if match is None or match(key)]
+            for key in keys:
+                self._drop(key)
+            if self.disk_dir:
+                for name in os.listdir(self.disk_dir):
+                    path = os.path.join(self.disk_dir, name)
+                    if name.endswith(".pkl") and (match is None or self._disk_key_matches(path, match)):
+                        os.remove(path)
+            return len(keys)
+
+    def _disk_key_matches(self, path, match):
+        try:
+            with open(path, "rb") as f:
+                return match(pickle.load(f))
+        except Exception:
+            return True
+
+    def _prune_disk(self):
+        # Files outlive the process, so expired ones and anything beyond max_entries are removed on start
+        now = time.time()
+        live = []
+        for name in os.listdir(self.disk_dir):
+            path = os.path.join(self.disk_dir, name)
+            if not name.endswith(".pkl"):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    pickle.load(f)
+                    expires_at = pickle.load(f)
+            except Exception:
+                expires_at = 0
+            if expires_at + self.stale_ttl < now:
+                os.remove(path)
+            else:
+                live.append((os.path.getmtime(path), path))
+        for _, path in sorted(live, reverse=True)[self.max_entries:]:
+            os.remove(path)
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _load(self, key, client=None):
+        # Key, expiry and entry are pickled one after another, so pruning and matching never load the payload
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                stored_key = pickle.load(f)
+                if stored_key != key:
+                    return None
+                pickle.load(f)
+                entry = PayloadUnpickler(f, client).load()
+            return entry if len(entry) == 3 else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable cache entry {key}: {e}")
+            return None
+
+    def _store(self, key, entry):
+        try:
+            with open(self._disk_path(key), "wb") as f:
+                pickle.dump(key, f)
+                pickle.dump(entry[0], f)
+                PayloadPickler(f).dump(entry)
+        except Exception as e:
+            logging.warning(f"Could not persist cache entry {key}: {e}")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def config():
+    return dict(settings.get("fantrax_cache", {}))
+
+_refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fantrax-refresh")
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cfg = config()
+            _cache = TTLCache(max_entries=cfg.get("max_entries", 256), disk_dir=cfg.get("disk_dir"),
+                              stale_ttl=cfg.get("stale_ttl", 3600))
+        return _cache
+
+def ttl_for(endpoint):
+    return config().get(f"ttl_{endpoint}", DEFAULT_TTLS[endpoint])
+
+def cached_call(api, endpoint, *args):
+    key = (endpoint, api.league_id, *args)
+    cache = get_cache()
+    with telemetry.span(f"fantrax.{endpoint}") as span:
+        entry = cache.peek(key, api)
+        if entry is not None:
+            value, _, expires_at = entry
+            span["cache"] = "hit"
+            if expires_at < time.time():
+                # Stale-while-revalidate: answer now, refresh in the background
+                span["cache"] = "stale"
+                _refresher.submit(cache.get_or_load, key, lambda: getattr(api, endpoint)(*args), ttl_for(endpoint), api)
+            return value
+
+        span["cache"] = "miss"
+        return cache.get_or_load(key, lambda: getattr(api, endpoint)(*args), ttl_for(endpoint), api)
+
+def refresh(api, endpoint, *args, min_remaining=0):
+    # Reload an entry ahead of expiry, used by the background prefetcher
+    key = (endpoint, api.league_id, *args)
+    cache = get_cache()
+    entry = cache.peek(key, api)
+    if entry is not None and entry[2] - time.time() > min_remaining:
+        return entry[0]
+    value = getattr(api, endpoint)(*args)
+    cache.set(key, value, ttl_for(endpoint))
+    return value
+
+def stored_at(api, endpoint, *args):
+    entry = get_cache().peek((endpoint, api.league_id, *args), api)
+    return None if entry is None else entry[1]
+
+def age(api, endpoint, *args):
+    entry = get_cache().peek((endpoint, api.league_id, *args), api)
+    return None if entry is None else time.time() - entry[1]
+
+def standings(api):
+    return cached_call(api, "standings")
+
+def roster_info(api, team_id):
+    return cached_call(api, "roster_info", team_id)
+
+def get_available_players(api, position, page=1):
+    # Page one keeps the unpaged key, shared with the prefetcher and scoring
+    if page == 1:
+        return cached_call(api, "get_available_players", position)
+    return cached_call(api, "get_available_players", position, page)
+
+def invalidate(league_id=None, endpoint=None):
+    def match(key):
+        return (endpoint is None or key[0] == endpoint) and (league_id is None or key[1] == league_id)
+    return get_cache().invalidate(None if league_id is None and endpoint is None else match)
@@ -0,0 +1,228 @@
+import hashlib
+import hmac
+import logging
+import os
+import pickle
+import queue
+import re
+import threading
+import time
+
+import telemetry
+import transport
+
+FANTRAX_LOGIN_URL = "https://www.fantrax.com/login"
+FANTRAX_REQ_URL = "https://www.fantrax.com/fxpa/req"
+
+# Selenium is imported on first use, so sessions restored from the store never load it
+def initialize_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    service = Service()
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)")
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    return webdriver.Chrome(service=service, options=options)
+
+class DriverPool:
+    def __init__(self, size=2, factory=initialize_driver):
+        self.size = size
+        self.factory = factory
+        self._idle = queue.Queue()
+        self.warming = False
+
+    def acquire(self):
+        # A warmed browser can sit idle for hours; one whose chromedriver died is replaced, not handed to a login
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return self.factory()
+            try:
+                driver.current_url
+                return driver
+            except Exception as e:
+                logging.warning(f"Dropping dead idle driver: {e}")
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def release(self, driver, healthy=True):
+        if healthy and self._idle.qsize() < self.size:
+            try:
+                driver.delete_all_cookies()
+                self._idle.put(driver)
+                return
+            except Exception as e:
+                logging.warning(f"Dropping unusable driver: {e}")
+        driver.quit()
+
+    def warm(self):
+        try:
+            while self._idle.qsize() < self.size:
+                self._idle.put(self.factory())
+        except Exception as e:
+            logging.warning(f"Could not warm a browser driver: {e}")
+        finally:
+            # Lets a later login warm the pool again once these drivers are used up
+            self.warming = False
+
+class SessionStore:
+    # Files are named by a keyed hash of the username only; the password is checked against a salted
+    # verifier inside the file, so neither can be recovered from the directory listing
+    def __init__(self, directory=".sessions", secret=None):
+        self.directory = directory
+        self.secret = secret
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, username):
+        if self.secret:
+            digest = hmac.new(str(self.secret).encode(), username.encode(), hashlib.sha256).hexdigest()
+        else:
+            digest = hashlib.sha256(username.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.cookie")
+
+    @staticmethod
+    def _verifier(password, salt):
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, 100_000)
+
+    def load(self, username, password):
+        try:
+            with open(self._path(username), "rb") as f:
+                saved = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable session file: {e}")
+            return None
+        if "salt" not in saved or not hmac.compare_digest(saved["verifier"], self._verifier(password, saved["salt"])):
+            return None
+        return saved
+
+    def save(self, username, password, cookies, league_id):
+        path = self._path(username)
+        salt = os.urandom(16)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            pickle.dump({"cookies": cookies, "league_id": league_id, "saved_at": time.time(),
+                         "salt": salt, "verifier": self._verifier(password, salt)}, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, username, password=None):
+        try:
+            os.remove(self._path(username))
+        except FileNotFoundError:
+            pass
+
+def cookies_fresh(cookies, now=None):
+    now = now or time.time()
+    return all(cookie.get('expiry', now + 1) > now for cookie in cookies)
+
+def session_from_cookies(cookies):
+    # fxpa/req is POST-only, but this app only ever reads through it
+    session = transport.ResilientSession(idempotent_urls=(FANTRAX_REQ_URL,))
+    for cookie in cookies:
+        session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'])
+    return session
+
+def probe(session, league_id, timeout=5):
+    # Cheap authenticated call; Fantrax answers with a pageError when the cookies are no longer logged in
+    try:
+        response = session.post(
+            FANTRAX_REQ_URL,
+            params={"leagueId": league_id},
+            json={"msgs": [{"method": "getFantasyTeams", "data": {"leagueId": league_id}}]},
+            timeout=timeout,
+        )
+        return response.ok and "pageError" not in response.json()
+    except Exception as e:
+        logging.info(f"Session probe failed: {e}")
+        return False
+
+def selenium_login(driver, username, password):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.common.by import By
+
+    wait = WebDriverWait(driver, 10)
+    logging.info("Navigating to the Fantrax login page.")
+    driver.get(FANTRAX_LOGIN_URL)
+    username_field = wait.until(EC.presence_of_element_located((By.ID, 'mat-input-0')))
+    password_field = driver.find_element(By.ID, 'mat-input-1')
+    login_button = driver.find_element(By.XPATH, '//button[@type="submit"]')
+
+    logging.info("Entering user credentials.")
+    username_field.send_keys(username)
+    password_field.send_keys(password)
+    login_button.click()
+
+    logging.info("Waiting for login to process.")
+    wait.until(EC.url_contains('/league/'))
+
+    match = re.search(r'/league/(\w+)/', driver.current_url)
+    league_id = match.group(1) if match else None
+    return driver.get_cookies(), league_id
+
+_apis_lock = threading.Lock()
+
+def api_for(league_id, session):
+    # One FantraxAPI per session and league, so reruns reuse its connections and lazily loaded teams. The clients
+    # hang off the session itself: they reference it anyway, and all go together once the session is dropped.
+    from fantraxapi import FantraxAPI
+    if session is None:
+        return FantraxAPI(league_id, session=session)
+    with _apis_lock:
+        apis = getattr(session, "fantrax_apis", None)
+        if apis is None:
+            apis = session.fantrax_apis = {}
+        if league_id not in apis:
+            apis[league_id] = FantraxAPI(league_id, session=session)
+        return apis[league_id]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(size=2, warm=False):
+    # warm=True starts the browsers in the background, so a login that misses the store finds one ready
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(size=size)
+        if warm and not _pool.warming:
+            _pool.warming = True
+            threading.Thread(target=_pool.warm, name="driver-warm", daemon=True).start()
+        return _pool
+
+def login(username, password, store, pool):
+    with telemetry.span("fantrax.login") as span:
+        saved = store.load(username, password)
+        if saved and cookies_fresh(saved['cookies']):
+            session = session_from_cookies(saved['cookies'])
+            if probe(session, saved['league_id']):
+                logging.info("Reusing stored Fantrax session.")
+                span["cache"] = "hit"
+                return session, saved['league_id']
+            store.delete(username, password)
+
+        span["cache"] = "miss"
+        driver = pool.acquire()
+        healthy = False
+        try:
+            cookies, league_id = selenium_login(driver, username, password)
+            healthy = True
+        finally:
+            pool.release(driver, healthy=healthy)
+
+    if league_id:
+        store.save(username, password, cookies, league_id)
+    return session_from_cookies(cookies), league_id
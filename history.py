@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+# Row identity per snapshot kind; only rows whose values changed since the last snapshot are written
+# (the last column is what trend() looks up). Rows sharing a key, like empty 'N/A' slots, are told apart by order.
+KEY_COLUMNS = {
+    "standings": ["table", "team"],
+    "roster": ["team_id", "Position", "Player"],
+}
+
+class HistoryStore:
+    def __init__(self, root="history"):
+        self.root = root
+        self._lock = threading.Lock()
+        self._last_hashes = {}
+        self._versions = {}
+        self._schemas = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-writer")
+        self._filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    def _path(self, league_id, kind):
+        return os.path.join(self.root, f"league={league_id}", f"kind={kind}")
+
+    def _normalize(self, df):
+        # Keep one physical type per column so snapshots taken on different days unify cleanly
+        df = df.copy()
+        for column in df.columns:
+            if pd.api.types.is_bool_dtype(df[column]):
+                continue
+            if pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = df[column].astype("float64")
+            else:
+                df[column] = df[column].astype(str)
+        return df
+
+    def _row_keys(self, df, key_columns):
+        keys = df[key_columns].astype(str)
+        occurrence = keys.groupby(key_columns, sort=False).cumcount().astype(str)
+        return keys.assign(_occurrence=occurrence).agg("\x1f".join, axis=1).tolist()
+
+    def _row_hashes(self, df, key_columns):
+        # One (key, hash) pair per row, in row order
+        hashes = pd.util.hash_pandas_object(df, index=False).astype("uint64")
+        return list(zip(self._row_keys(df, key_columns), hashes))
+
+    def _load_last_hashes(self, league_id, kind, key_columns, columns):
+        table = self.query(league_id, kind, columns=columns)
+        if table is None or table.empty or not set(columns) <= set(table.columns):
+            return {}
+        # Every row of each key's latest snapshot, so duplicate keys are numbered the same way as on write
+        latest = table[table["snapshot_at"] == table.groupby(key_columns)["snapshot_at"].transform("max")]
+        return dict(self._row_hashes(self._normalize(latest[columns]).reset_index(drop=True), key_columns))
+
+    def record(self, league_id, kind, df, scope=None, version=None):
+        # version identifies the upstream fetch (the cache's stored_at), so one fetch is snapshotted once
+        marker = (league_id, kind, scope)
+        with self._lock:
+            if version is not None and self._versions.get(marker) == version:
+                return None
+            self._versions[marker] = version
+        return self._writer.submit(self._record, league_id, kind, df)
+
+    def _record(self, league_id, kind, df):
+        try:
+            return self._write(league_id, kind, df)
+        except Exception as e:
+            logging.warning(f"Could not snapshot {kind} for league {league_id}: {e}")
+            return None
+
+    def _write(self, league_id, kind, df):
+        key_columns = KEY_COLUMNS[kind]
+        df = self._normalize(df)
+        with self._lock:
+            last = self._last_hashes.get((league_id, kind))
+        if last is None:
+            last = self._load_last_hashes(league_id, kind, key_columns, list(df.columns))
+
+        hashes = self._row_hashes(df, key_columns)
+        changed = [last.get(key) != value for key, value in hashes]
+        with self._lock:
+            last.update(hashes)
+            self._last_hashes[(league_id, kind)] = last
+        if not any(changed):
+            return 0
+
+        now = datetime.now(timezone.utc)
+        rows = df.loc[changed].assign(snapshot_at=pd.Timestamp(now))
+        directory = os.path.join(self._path(league_id, kind), f"date={now:%Y-%m-%d}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{int(time.time() * 1000)}-{hashlib.sha1(str(changed).encode()).hexdigest()[:8]}.parquet")
+        pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), path)
+        return len(rows)
+
+    def _unified_schema(self, path, fragments):
+        # Reading a footer per fragment on every query grows with the season, so the unified schema is kept and
+        # only files written since (by this process or another) are opened
+        paths = {fragment.path for fragment in fragments}
+        with self._lock:
+            cached = self._schemas.get(path)
+        if cached is not None and cached[0] <= paths:
+            known, schema = cached
+            new = [fragment.physical_schema for fragment in fragments if fragment.path not in known]
+            if not new:
+                return schema
+            schema = pa.unify_schemas([schema, *new])
+        else:
+            schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments])
+        with self._lock:
+            self._schemas[path] = (paths, schema)
+        return schema
+
+    def _dataset(self, league_id, kind):
+        path = self._path(league_id, kind)
+        if not os.path.isdir(path):
+            return None
+        dataset = ds.dataset(path, format="parquet", partitioning="hive", filesystem=self._filesystem)
+        fragments = list(dataset.get_fragments())
+        if not fragments:
+            return None
+        schema = self._unified_schema(path, fragments)
+        partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+        return ds.dataset(path, schema=schema.append(pa.field("date", pa.string())), format="parquet",
+                          partitioning=partitioning, filesystem=self._filesystem)
+
+    def query(self, league_id, kind, columns=None, start=None, end=None, where=None):
+        dataset = self._dataset(league_id, kind)
+        if dataset is None:
+            return None
+        expression = None
+        # Partition pruning on date first, then the exact time range
+        if start is not None:
+            start = pd.Timestamp(start, tz="UTC") if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)
+            expression = (ds.field("date") >= f"{start:%Y-%m-%d}") & (ds.field("snapshot_at") >= pa.scalar(start.to_pydatetime(), pa.timestamp("ns", "UTC")))
+        if end is not None:
+            end = pd.Timestamp(end, tz="UTC") if pd.Timestamp(end).tzinfo is None else pd.Timestamp(end)
+            clause = (ds.field("date") <= f"{end:%Y-%m-%d}") & (ds.field("snapshot_at") <= pa.scalar(end.to_pydatetime(), pa.timestamp("ns", "UTC")))
+            expression = clause if expression is None else expression & clause
+        for column, value in (where or {}).items():
+            clause = ds.field(column) == value
+            expression = clause if expression is None else expression & clause
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + ["snapshot_at"]))
+            columns = [column for column in columns if column in dataset.schema.names]
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def trend(self, league_id, kind, key, stat, days=30):
+        key_column = KEY_COLUMNS[kind][-1]
+        start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
+        table = self.query(league_id, kind, columns=[key_column, stat], start=start, where={key_column: key})
+        if table is None or table.empty or stat not in table.columns:
+            return None
+        return table.dropna(subset=[stat]).sort_values("snapshot_at")[["snapshot_at", stat]].reset_index(drop=True)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(root="history"):
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = HistoryStore(root)
+        return _stores[root]
+
+def record_safely(store, league_id, kind, df, scope=None, version=None):
+    try:
+        return store.record(league_id, kind, df, scope=scope, version=version)
+    except Exception as e:
+        logging.warning(f"Could not snapshot {kind} for league {league_id}: {e}")
+        return None
@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fantrax_cache
+import telemetry
+import utils
+
+class LeagueRosters:
+    def __init__(self, league_id):
+        self.league_id = league_id
+        self._lock = threading.Lock()
+        self.by_id = {}
+        self.id_by_name = {}
+        self.names = {}
+        self.fetched_at = {}
+        self._frames = {}
+
+    def _fetch(self, api, team):
+        return team, fantrax_cache.roster_info(api, team.team_id)
+
+    def refresh(self, api, max_age=None, max_workers=8):
+        max_age = fantrax_cache.ttl_for("roster_info") if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            stale = [team for team in api.teams if now - self.fetched_at.get(team.team_id, 0) >= max_age]
+        if not stale:
+            return []
+
+        refreshed = []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(stale))) as pool:
+            futures = [pool.submit(telemetry.bind(self._fetch), api, team) for team in stale]
+            for future in futures:
+                try:
+                    team, roster = future.result()
+                except Exception as e:
+                    logging.warning(f"Error fetching roster in league {self.league_id}: {e}")
+                    continue
+                with self._lock:
+                    self.by_id[team.team_id] = roster
+                    self.id_by_name[team.name.lower()] = team.team_id
+                    self.names[team.team_id] = team.name
+                    self.fetched_at[team.team_id] = time.time()
+                    self._frames.pop(team.team_id, None)
+                refreshed.append(team.team_id)
+        return refreshed
+
+    def resolve(self, team):
+        with self._lock:
+            if team in self.by_id:
+                return team
+            return self.id_by_name.get(str(team).lower())
+
+    def roster(self, team):
+        team_id = self.resolve(team)
+        return self.by_id.get(team_id) if team_id else None
+
+    def frame(self, team):
+        team_id = self.resolve(team)
+        if team_id is None:
+            return None
+        with self._lock:
+            if team_id not in self._frames:
+                self._frames[team_id] = utils.playerstats_to_dataframe(self.by_id[team_id])
+            # Callers in every session share the cached frame, so each gets a copy
+            return self._frames[team_id].copy()
+
+    def team_names(self):
+        with self._lock:
+            return list(self.names.values())
+
+    def items(self):
+        with self._lock:
+            return [(team_id, self.names[team_id], roster) for team_id, roster in self.by_id.items()]
+
+    def version(self):
+        with self._lock:
+            return tuple(sorted(self.fetched_at.items()))
+
+_leagues = {}
+_leagues_lock = threading.Lock()
+
+def get_league_rosters(league_id):
+    with _leagues_lock:
+        if league_id not in _leagues:
+            _leagues[league_id] = LeagueRosters(league_id)
+        return _leagues[league_id]
+
+def load(api, max_age=None):
+    rosters = get_league_rosters(api.league_id)
+    rosters.refresh(api, max_age=max_age)
+    return rosters
@@ -0,0 +1,60 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+def normalize_prompt(prompt):
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+def cache_key(prompt, model, temperature):
+    payload = json.dumps([normalize_prompt(prompt), model, round(float(temperature), 3)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResponseCache:
+    def __init__(self, path="llm_cache.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, created_at REAL, expires_at REAL)"
+            )
+
+    def _conn(self):
+        # sqlite connections are not shareable across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT response FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, response, ttl, model=None):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now + ttl),
+            )
+
+    def purge(self):
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(path="llm_cache.sqlite3"):
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path)
+            _caches[path].purge()
+        return _caches[path]
@@ -1,17 +1,13 @@
 import streamlit as st
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-import json
-from fantraxapi import FantraxAPI
-import utils
+import fantrax_session
+import agent_tools
+import telemetry
+import transport
+import chat_memory
+import session_state
+import prompt_context
+import hashlib
 import os
-from langchain.agents import create_structured_chat_agent
-from langchain_core.tools import StructuredTool
-from langchain import hub
-from langchain_community.tools import TavilySearchResults
-from langchain.agents import AgentExecutor
-import ollama
-from langchain_ollama import OllamaLLM
 
 st.title("💬 Chat With Yer Team - Agent Style")
 
@@ -20,13 +16,13 @@ if not st.session_state.get('logged_in'):
     st.page_link("Home.py", label="Go Home")
     st.stop()
 
-if 'selected_team_name' not in st.session_state or 'roster' not in st.session_state:
+if 'selected_team_name' not in st.session_state or 'selected_team_id' not in st.session_state:
     st.info("Please wait for the login process on the Home page to complete")
     st.stop()
 
-# Initialize Streamlit session state for messages
-if 'messages' not in st.session_state:
-    st.session_state.messages = []
+# Chat state lives in a capped per-session slot; only the last few turns go back to the LLM verbatim
+slot = session_state.current()
+memory = slot.memory("agent", lambda: chat_memory.ChatMemory(st.secrets.get("chat_memory_turns", 6), st.secrets.get("chat_memory_tokens", 1500)))
 
 os.environ['TAVILY_API_KEY'] = st.secrets.get('tavily_key')
 
@@ -36,67 +32,30 @@ os.environ['LANGCHAIN_ENDPOINT'] = "https://api.smith.langchain.com"
 os.environ['LANGCHAIN_API_KEY'] = st.secrets.get('langsmith_key')
 os.environ['LANGCHAIN_PROJECT'] = st.secrets.get('langsmith_project')
 
-api = FantraxAPI(st.session_state['league_id'], session=st.session_state['session'])
-standings_df = utils.fetch_standings(api)
-roster_df = utils.fetch_team_roster(api, st.session_state['selected_team_id'])
-input_data = {
-    "current_roster": json.loads(roster_df.to_json(orient="records")),
-    "standings": json.loads(standings_df.to_json(orient="records"))
-}
-
-def fetch_league_standings():
-    standings = utils.fetch_standings(api)
-    standings['is_my_team'] = standings['team'].apply(lambda x: str(x).lower() == st.session_state['selected_team_name'].lower())
-    return standings
-
-def fetch_user_team_roster():
-    return utils.fetch_team_roster(api, st.session_state['selected_team_id'])
-
-def fetch_opposing_team_roster(team_name):
-    tl = [team for team in api.teams if team.name == team_name]
-    if not tl:
-        return None
-    return utils.fetch_team_roster(api, tl[0])
-
-def fetch_user_team_name():
-    return st.session_state['selected_team_name']
-
-def fetch_current_free_agents(position: str):
-    return utils.fetch_free_agents(api, position)
-
-def search_player_news(query: str):
-    search_tool = TavilySearchResults(
-        max_results=5,
-        search_params={
-            "time_range": "1d",
-            "sort_by": "date"
-        }
-    )
-    return search_tool.invoke({"query": query + " Performance in last game"})
-
-def search_game_scores(query: str):
-    search_tool = TavilySearchResults(
-        max_results=5,
-        search_params={
-            "time_range": "1d",
-            "sort_by": "date"
-        }
-    )
-    return search_tool.invoke({"query": query})
-
-tools = [
-    StructuredTool.from_function(search_player_news, name="Search Player News", description="Search for recent player information and performance, pass a string whose value is the player name"),
-    StructuredTool.from_function(fetch_league_standings, name="Fetch League Standings", description="Fetch the league standings, returns a dataframe with columns 'team', 'rank', and other stats. The 'is_my_team' column is a boolean indicating if the team is the user's team"),
-    StructuredTool.from_function(fetch_user_team_roster, name="Fetch User's Team Roster", description="Get the roster of the user's team"),
-    StructuredTool.from_function(fetch_user_team_name, name="Fetch User's Team Name", description="Get the name of the user's team"),
-    StructuredTool.from_function(fetch_current_free_agents, name="Fetch Free Agents", description="Get a list of top available free agents for a given position, pass a string whose value is one of 'F', 'D' or 'G'"),
-    StructuredTool.from_function(fetch_opposing_team_roster, name="Fetch Opposing Team Roster", description="Get the roster of an opposing team for potential trades, pass a string whose value is an opposing team name"),
-    StructuredTool.from_function(search_game_scores, name="Search Game Scores", description="Search for recent game scores of a given team, pass a string whose value is the team name")
-]
-
-# Properly format tools and tool_names for inclusion in the prompt
-chat_prompt_template = hub.pull("danglesnipecelly/fantasy-hockey-coach:e8792e65")
-chat_prompt = chat_prompt_template
+# Warm the league's shared frames so the first tool calls are answered from memory
+api = fantrax_session.api_for(st.session_state['league_id'], st.session_state['session'])
+league = session_state.league_store(st.session_state['league_id'])
+league.standings(api)
+league.roster(api, st.session_state['selected_team_id'])
+
+def llm_config(provider, model, secret):
+    # Executors are shared per configuration, so never key on the raw API key
+    return (provider, model, hashlib.sha256(str(secret).encode()).hexdigest()[:16])
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_agent_executor(config, _llm):
+    from langchain.agents import AgentExecutor
+    import parallel_agent
+    tools = agent_tools.build_tools()
+    agent = parallel_agent.create_parallel_agent(llm=_llm, tools=tools, prompt=agent_tools.load_chat_prompt())
+    # Wrap the agent in an AgentExecutor to manage interaction flow; run async, it dispatches a step's actions concurrently
+    return AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=False, handle_parsing_errors=True,
+                         max_execution_time=st.secrets.get("agent_timeout", 90))
+
+def ollama_llm(server, model):
+    import ollama
+    from langchain_ollama import OllamaLLM
+    return OllamaLLM(client=ollama.Client(host=server), model=model)
 
 def get_llm():
     # Add model selection dropdown
@@ -110,14 +69,15 @@ def get_llm():
         if model_choice == "Groq":
             groq_key = st.sidebar.text_input("Enter your Groq API key:", type="password")
             if groq_key:
-                return ChatGroq(api_key=groq_key, model="llama3-8b-8192")
+                slot.llm_config = llm_config("Groq", "llama3-8b-8192", groq_key)
+                return session_state.shared_llm(slot.llm_config, lambda: transport.chat_model("Groq", "llama3-8b-8192", groq_key, st.secrets.get("llm_timeout", 60)))
             
         elif model_choice == "Ollama":
             ollama_server = st.sidebar.text_input("Enter Ollama server URL:", value="http://localhost:11434")
             ollama_model = st.sidebar.text_input("Enter Ollama model name:", value="mistral")
             if ollama_server and ollama_model:
-                client = ollama.Client(host=ollama_server)
-                return OllamaLLM(client=client, model=ollama_model)
+                slot.llm_config = llm_config("Ollama", ollama_model, ollama_server)
+                return session_state.shared_llm(slot.llm_config, lambda: ollama_llm(ollama_server, ollama_model))
                 
         else:  # OpenAI
             openai_key = st.sidebar.text_input("Enter your OpenAI API key:", type="password")
@@ -127,34 +87,35 @@ def get_llm():
                 help="Choose your preferred OpenAI model"
             )
             if openai_key:
-                return ChatOpenAI(openai_api_key=openai_key, model_name=model_name)
+                slot.llm_config = llm_config("OpenAI", model_name, openai_key)
+                return session_state.shared_llm(slot.llm_config, lambda: transport.chat_model("OpenAI", model_name, openai_key, st.secrets.get("llm_timeout", 60)))
     else:
-        return ChatGroq(api_key=st.secrets.get("groq_api_key"), model="llama3-8b-8192")
+        slot.llm_config = llm_config("Groq", "llama3-8b-8192", st.secrets.get("groq_api_key"))
+        return session_state.shared_llm(slot.llm_config, lambda: transport.chat_model("Groq", "llama3-8b-8192", st.secrets.get("groq_api_key"), st.secrets.get("llm_timeout", 60)))
     
     st.warning("Please provide the required API credentials to continue.")
     st.stop()
 
 # Initialize LLM
-if 'llm' not in st.session_state:
-    st.session_state.llm = get_llm()
-llm = st.session_state.llm
+if slot.llm is None:
+    slot.llm = get_llm()
+llm = slot.llm
 
-agent = create_structured_chat_agent(llm=llm, tools=tools, prompt=chat_prompt)
-
-# Wrap the agent in an AgentExecutor to manage interaction flow
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=False, handle_parsing_errors=True)
+agent_executor = build_agent_executor(slot.llm_config, llm)
 
 with st.sidebar:
+    telemetry.render_panel()
+    session_state.render_memory()
     if st.button("Clear Chat Window", use_container_width=True, type="primary"):
-        st.session_state.messages = []
+        slot.clear_chat("agent")
         st.rerun()
 
     if st.session_state['league_id'] not in st.secrets.get("league_whitelist", []):
         if st.sidebar.button("Change LLM Settings"):
-            del st.session_state.llm
+            slot.llm = None
             st.rerun()
 
-for message in st.session_state.messages:
+for message in slot.transcript("agent"):
     if message['role'] in ['user', 'ai']:
         with st.chat_message(message['role']):
             st.markdown(message['content'])
@@ -163,18 +124,24 @@ if prompt := st.chat_input("Are you ready? Good, cuz yer goin!"):
     prompt = prompt.replace('\n', ' \n')
     with st.chat_message("user"):
         st.markdown(prompt)
-    st.session_state.messages.append({'role': 'user', 'content': prompt})
+    slot.append("agent", 'user', prompt)
     with st.chat_message("ai"):
         message_placeholder = st.empty()
         message_placeholder.markdown("S'YeahSo...")
         response = ''
         try:
-            response = agent_executor.invoke({"input": prompt, "chat_history": st.session_state.messages})
+            history = memory.history()
+            report = memory.report(prompt_context.estimate_tokens(prompt))
+            response = agent_tools.run_with_session(lambda: agent_executor.ainvoke({"input": prompt, "chat_history": history}))
             if isinstance(response, dict) and 'output' in response:
                 response_text = response['output']
             else:
                 response_text = response
             message_placeholder.markdown(response_text)
-            st.session_state.messages.append({'role': 'ai', 'content': response_text})
+            slot.append("agent", 'ai', response_text)
+            st.caption(chat_memory.format_report(report))
+            memory.append('user', prompt)
+            memory.append('ai', response_text)
+            memory.compact(llm.invoke)
         except Exception as e:
             st.exception(e)
@@ -1,10 +1,12 @@
 import streamlit as st
 import google.generativeai as genai
-import time
-import random
-import json
-from fantraxapi import FantraxAPI
+import fantrax_session
 import utils
+import prompt_context
+import streaming
+import telemetry
+import chat_memory
+import session_state
 
 st.title("💬 Chat With Yer Team")
 
@@ -17,24 +19,27 @@ if not st.session_state["selected_team_name"]:
     st.info("Please wait for the login process on the Home page to complete") 
     st.stop()
 
-# Initialize Streamlit session state for messages
-if 'messages' not in st.session_state:
-    st.session_state.messages = []
-    
-api = FantraxAPI(st.session_state['league_id'], session=st.session_state['session'])
-standings_df = utils.fetch_standings(api)
-roster_df = utils.fetch_team_roster(api, st.session_state['selected_team_id'])
-input_data = {
-    "current_roster": json.loads(roster_df.to_json(orient="records")),
-    "standings": json.loads(standings_df.to_json(orient="records"))
-}
+# Chat state lives in a capped per-session slot; only the last few turns go back to Gemini verbatim
+slot = session_state.current()
+memory = slot.memory("chat", lambda: chat_memory.ChatMemory(st.secrets.get("chat_memory_turns", 6), st.secrets.get("chat_memory_tokens", 1500)))
+
+# The encoded roster and standings are shared by every session in the league and rebuilt only when Fantrax data changes
+api = fantrax_session.api_for(st.session_state['league_id'], st.session_state['session'])
+prompt_data = session_state.league_store(st.session_state['league_id']).context(
+    api, st.session_state['selected_team_id'], st.secrets.get("prompt_token_budget", 3000), st.session_state['selected_team_name'])
+if prompt_data is None:
+    st.error("Could not load the roster and standings.")
+    st.stop()
 
 sys_instr = f"""
     You are the head coach of a fantasy hockey team {st.session_state['selected_team_name']}, tasked with guiding the user, the GM, with humor, strategy, and insights. 
     You must keep responses under 75 words. 
     #### Data Provided:
-    - Current Roster: {json.dumps(input_data['current_roster'], indent=2)}
-    - League Standings: {json.dumps(input_data['standings'], indent=2)}
+    Tables are pipe-separated with a header row; empty cells mean no data.
+    - Current Roster:
+    {prompt_data['roster']}
+    - League Standings:
+    {prompt_data['standings']}
     #### Tone:
     - Speak like a seasoned hockey player and coach—gritty, humorous, occasionally chirping the user and team with appropriate hockey cliches but always constructive.
     - Answer questions directly using the roster and standings already given.
@@ -46,6 +51,10 @@ sys_instr = f"""
     - Offer practical, strategic advice: trades, lineup changes, or improvements like power play efficiency.
     The goal: Make the GM feel like they're talking to an old-school, yet insightful coach who wants the team to win, keeping it light-hearted and fun.
     """
+if memory.summary:
+    sys_instr += f"""#### Earlier in this conversation:
+    {memory.summary}
+    """
 
 if st.session_state['league_id'] in st.secrets.get("league_whitelist", []):
     llm_api_key = st.secrets.get("gemini_key")
@@ -55,24 +64,19 @@ else:
 # Initialize the Generative Model
 genai.configure(api_key=llm_api_key)
 model = genai.GenerativeModel("gemini-1.5-flash-8b", system_instruction=sys_instr)
-chat = model.start_chat(history = st.session_state.messages)
+chat = model.start_chat(history=[{"role": m["role"], "parts": [m["content"]]} for m in memory.messages])
 
 with st.sidebar:
+    telemetry.render_panel()
+    session_state.render_memory()
+    st.caption(f"Prompt context: ~{prompt_data['tokens']} tokens")
     if st.button("Clear Chat Window", use_container_width=True, type="primary"):
-        st.session_state.messages = []
+        slot.clear_chat("chat")
         st.rerun()
 
-for message in chat.history:
-    if message.role == 'model':
-        role = "coach"
-    elif message.role == 'user':
-        role = "GM"
-    else:
-        role = message.role
-
-    with st.chat_message(role):
-        if role != 'system':
-            st.markdown(message.parts[0].text)
+for message in slot.transcript("chat"):
+    with st.chat_message("coach" if message['role'] == 'model' else "GM"):
+        st.markdown(message['content'])
 
 if prompt := st.chat_input("Are you ready? Good, cuz yer goin!"):
     prompt = prompt.replace('\n', ' \n')
@@ -81,22 +85,22 @@ if prompt := st.chat_input("Are you ready? Good, cuz yer goin!"):
     with st.chat_message("coach"):
         message_placeholder = st.empty()
         message_placeholder.markdown("S'YeahSo...")
+        report = memory.report(prompt_context.estimate_tokens(sys_instr + prompt))
         try:
-            full_response = ""
-            for chunk in chat.send_message(prompt, stream=True):
-                word_count = 0
-                random_int = random.randint(5,10)
-                for word in chunk.text:
-                    full_response+=word
-                    word_count+=1
-                    if word_count == random_int:
-                        time.sleep(0.05)
-                        message_placeholder.markdown(full_response + "_")
-                        word_count = 0
-                        random_int = random.randint(5,10)
-            message_placeholder.markdown(full_response)
+            with telemetry.span("llm.gemini.chat", model="gemini-1.5-flash-8b") as span:
+                span["prompt_tokens"] = report["prompt_tokens"]
+                chunks = (chunk.text for chunk in chat.send_message(prompt, stream=True, request_options={"timeout": st.secrets.get("llm_timeout", 60)}))
+                full_response, timing = streaming.render_stream(message_placeholder, chunks)
+                span["completion_tokens"] = prompt_context.estimate_tokens(full_response)
+                span["ttft_ms"] = round(timing["ttft"] * 1000, 3) if timing["ttft"] is not None else None
+            st.caption(f"{streaming.format_timing(timing)} · {chat_memory.format_report(report)}")
+            slot.append("chat", 'user', prompt)
+            slot.append("chat", 'model', full_response)
+            memory.append('user', prompt)
+            memory.append('model', full_response)
+            summarizer = genai.GenerativeModel("gemini-1.5-flash-8b")
+            memory.compact(lambda text: summarizer.generate_content(text).text)
         except genai.types.generation_types.BlockedPromptException as e:
             st.exception(e)
         except Exception as e:
             st.exception(e)
-        st.session_state.messages = chat.history
@@ -0,0 +1,69 @@
+import json
+import re
+
+from langchain.agents import AgentOutputParser
+from langchain.agents.format_scratchpad import format_log_to_str
+from langchain.tools.render import render_text_description_and_args
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.exceptions import OutputParserException
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnablePassthrough
+from langchain_core.utils.json import parse_json_markdown
+
+# Inserted after the coaching prompt's system message, so the pinned hub prompt stays untouched
+PARALLEL_HINT = """When you need several tools whose inputs do not depend on each other, put them in one Action as a JSON list:
+```
+[
+  {{"action": $TOOL_NAME, "action_input": $INPUT}},
+  {{"action": $TOOL_NAME, "action_input": $INPUT}}
+]
+```
+They run at the same time and you get one Observation per action, in the same order. "Final Answer" must always be on its own."""
+
+class ParallelActionParser(AgentOutputParser):
+    # Same JSON blob format as the structured chat agent, but a list of blobs becomes concurrent actions
+    def parse(self, text):
+        try:
+            response = parse_json_markdown(text)
+        except Exception as e:
+            raise OutputParserException(f"Could not parse LLM output: {text}") from e
+
+        blobs = response if isinstance(response, list) else [response]
+        if not blobs or not all(isinstance(blob, dict) and "action" in blob for blob in blobs):
+            raise OutputParserException(f"Could not parse LLM output: {text}")
+
+        finals = [blob for blob in blobs if blob["action"] == "Final Answer"]
+        if finals and len(blobs) > 1:
+            # Answering while asking for tools means the answer was written without their observations
+            raise OutputParserException(f"Could not parse LLM output: \"Final Answer\" must be the only action in its step: {text}")
+        if finals:
+            return AgentFinish({"output": finals[0].get("action_input", "")}, text)
+
+        # Only the first action carries the thought, so the scratchpad doesn't repeat it per observation
+        thought = re.split(r"```|\[|\{", text, maxsplit=1)[0]
+        actions = []
+        for i, blob in enumerate(blobs):
+            log = f"Action:\n```\n{json.dumps(blob)}\n```"
+            actions.append(AgentAction(blob["action"], blob.get("action_input", {}), (thought if i == 0 else "") + log))
+        return actions[0] if len(actions) == 1 else actions
+
+    @property
+    def _type(self):
+        return "parallel-structured-chat"
+
+def with_parallel_hint(prompt):
+    messages = list(prompt.messages)
+    return ChatPromptTemplate.from_messages([*messages[:1], ("system", PARALLEL_HINT), *messages[1:]])
+
+def create_parallel_agent(llm, tools, prompt):
+    # Mirrors create_structured_chat_agent, swapping in the parser that understands action lists
+    prompt = with_parallel_hint(prompt).partial(
+        tools=render_text_description_and_args(list(tools)),
+        tool_names=", ".join(t.name for t in tools),
+    )
+    return (
+        RunnablePassthrough.assign(agent_scratchpad=lambda x: format_log_to_str(x["intermediate_steps"]))
+        | prompt
+        | llm.bind(stop=["Observation"])
+        | ParallelActionParser()
+    )
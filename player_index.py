@@ -0,0 +1,106 @@
+import difflib
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+import fantrax_cache
+import league_rosters
+
+POSITIONS = ['F', 'D', 'G']
+FREE_AGENT = "Free Agent"
+
+def normalize(name):
+    # "Juraj Slafkovský", "juraj slafkovsky" and "Slafkovsky, Juraj." all land on the same key
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode().lower()
+    if text.count(',') == 1:
+        last, first = text.split(',')
+        text = f"{first} {last}"
+    return " ".join(re.sub(r"[^a-z0-9 ]+", " ", text).split())
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class PlayerIndex:
+    def __init__(self):
+        self.entries = []
+        self.by_name = defaultdict(list)
+        self.by_trigram = defaultdict(set)
+
+    def add(self, name, kind, **info):
+        key = normalize(name)
+        if not key:
+            return
+        entry = {"name": name, "kind": kind, "key": key, **info}
+        i = len(self.entries)
+        self.entries.append(entry)
+        self.by_name[key].append(i)
+        for gram in trigrams(key):
+            self.by_trigram[gram].add(i)
+
+    def lookup(self, name, kind=None, limit=5, cutoff=0.6):
+        key = normalize(name)
+        exact = [self.entries[i] for i in self.by_name.get(key, []) if kind is None or self.entries[i]["kind"] == kind]
+        if exact:
+            return [(entry, 1.0) for entry in exact[:limit]]
+
+        # Trigram overlap narrows the field, edit similarity orders what is left
+        grams = trigrams(key)
+        overlap = Counter(i for gram in grams for i in self.by_trigram.get(gram, ()))
+        matches = []
+        for i, _ in overlap.most_common(50):
+            entry = self.entries[i]
+            if kind is not None and entry["kind"] != kind:
+                continue
+            # Also score against the surname alone so "McDavid" finds "Connor McDavid"
+            score = max(difflib.SequenceMatcher(None, key, entry["key"]).ratio(),
+                        difflib.SequenceMatcher(None, key, entry["key"].split()[-1]).ratio() if " " not in key else 0)
+            if score >= cutoff:
+                matches.append((entry, round(score, 3)))
+        return sorted(matches, key=lambda match: match[1], reverse=True)[:limit]
+
+    def best(self, name, kind=None, cutoff=0.6):
+        matches = self.lookup(name, kind, limit=1, cutoff=cutoff)
+        return matches[0][0] if matches else None
+
+def add_roster(index, team_id, team_name, roster):
+    index.add(team_name, "team", team_id=team_id)
+    for row in roster.rows:
+        if row.player:
+            index.add(row.player.name, "player", team=team_name, team_id=team_id, position=row.pos.name,
+                      latest=row.latest_comment)
+
+def build(rosters, pools):
+    index = PlayerIndex()
+    for team_id, team_name, roster in rosters.items():
+        add_roster(index, team_id, team_name, roster)
+    for players in pools:
+        for row in getattr(players, 'rows', None) or []:
+            if row.player:
+                index.add(row.player.name, "player", team=FREE_AGENT, team_id=None, position=row.pos.name,
+                          latest=row.latest_comment)
+    return index
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def load(api):
+    # Rebuilt only when a roster or free-agent page was refetched since the last build
+    rosters = league_rosters.load(api)
+    pools = [fantrax_cache.get_available_players(api, position) for position in POSITIONS]
+    version = (rosters.version(), tuple(fantrax_cache.stored_at(api, "get_available_players", position) for position in POSITIONS))
+    with _indexes_lock:
+        cached = _indexes.get(api.league_id)
+        if cached and cached[0] == version:
+            return cached[1]
+    index = build(rosters, pools)
+    with _indexes_lock:
+        _indexes[api.league_id] = (version, index)
+    return index
+
+def cached(league_id):
+    # The last index built for the league, however old, without touching Fantrax
+    with _indexes_lock:
+        entry = _indexes.get(league_id)
+    return entry[1] if entry else None
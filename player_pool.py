@@ -0,0 +1,99 @@
+import inspect
+from types import SimpleNamespace
+
+import pandas as pd
+
+import fantrax_cache
+import utils
+
+CHUNK_SIZE = 50
+
+# *** PREDICATES ***
+# Each takes a converted chunk and returns a boolean mask; columns a page lacks match nothing
+def position_in(*positions):
+    wanted = {position.upper() for position in positions}
+    return lambda df: df['Position'].astype(str).str.upper().str.split(',').map(lambda names: bool(wanted & {n.strip() for n in names}))
+
+def min_games(n):
+    return at_least('GP', n)
+
+def at_least(stat, value):
+    return lambda df: df[stat] >= value if stat in df else pd.Series(False, index=df.index)
+
+def at_most(stat, value):
+    return lambda df: df[stat] <= value if stat in df else pd.Series(False, index=df.index)
+
+# *** STREAMING ***
+def supports_paging(api):
+    try:
+        inspect.signature(api.get_available_players).bind('F', 2)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+def pages(api, position, max_pages=None):
+    # Pages are fetched only as the consumer asks for them, each through the shared cache
+    paged = supports_paging(api)
+    first = None
+    page = 1
+    while max_pages is None or page <= max_pages:
+        if page > 1 and not paged:
+            # Client without paging: the first page is the whole pool
+            return
+        players = fantrax_cache.get_available_players(api, position, page)
+        rows = getattr(players, 'rows', None) if players else None
+        if not rows:
+            return
+        if first is not None:
+            # A client that ignores the page number hands back page one again
+            if rows[0].player and first[0].player and rows[0].player.name == first[0].player.name:
+                return
+        yield players
+        if first is not None and len(rows) < len(first):
+            return
+        first = first or rows
+        page += 1
+
+def chunks(api, position, chunk_size=CHUNK_SIZE, max_pages=None):
+    for players in pages(api, position, max_pages):
+        for start in range(0, len(players.rows), chunk_size):
+            yield utils.playerstats_to_dataframe(SimpleNamespace(rows=players.rows[start:start + chunk_size]))
+
+def top_k(frames, k=5, key='RkOv', ascending=True, where=(), presorted=True):
+    # When the stream arrives ordered by key, stop as soon as a chunk can no longer beat the current k-th row.
+    # The order is checked rather than trusted: once any chunk is out of order the whole stream is read.
+    best = None
+    ordered = presorted
+    last = None
+    for df in frames:
+        ranked = key in df
+        if ranked and ordered:
+            values = df[key].dropna()
+            if not ascending:
+                values = -values
+            if not values.is_monotonic_increasing or (last is not None and not values.empty and values.iloc[0] < last):
+                ordered = False
+            elif not values.empty:
+                last = values.iloc[-1]
+        if ranked and ordered and best is not None and len(best) == k:
+            bound = df[key].min() if ascending else df[key].max()
+            kth = best[key].iloc[-1]
+            if (bound > kth) if ascending else (bound < kth):
+                break
+        for predicate in where:
+            df = df[predicate(df).fillna(False).astype(bool)]
+        if df.empty:
+            continue
+        best = df if best is None else pd.concat([best, df], ignore_index=True)
+        if ranked:
+            best = best.sort_values(by=key, ascending=ascending, kind='stable')
+        elif len(best) >= k:
+            # Nothing to rank by, so the stream's own order decides
+            return best.head(k).reset_index(drop=True)
+        best = best.head(k).reset_index(drop=True)
+    return best
+
+def free_agents(api, position, k=5, where=(), key='RkOv', ascending=True, max_pages=None, chunk_size=CHUNK_SIZE):
+    # Fantrax normally lists available players by overall rank, so early termination is only attempted on RkOv
+    frames = chunks(api, position, chunk_size, max_pages)
+    return top_k(frames, k, key, ascending, where, presorted=(key == 'RkOv' and ascending))
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+
+import fantrax_cache
+import fantrax_session
+
+POSITIONS = ['F', 'D', 'G']
+
+class Prefetcher:
+    def __init__(self, interval=600, idle_timeout=1800):
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._owners = {}
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    def register(self, league_id, session, owner):
+        # One registration per app session; a league stays warm while any of its sessions is active
+        with self._lock:
+            self._owners[owner] = {"league_id": league_id, "session": session, "last_seen": time.time()}
+            if self._thread is None or not self._thread.is_alive():
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name="fantrax-prefetch", daemon=True)
+                self._thread.start()
+
+    def unregister(self, owner):
+        with self._lock:
+            self._owners.pop(owner, None)
+
+    def stop(self):
+        # Each thread gets its own stop event, so a later register() starts a fresh one
+        with self._lock:
+            if self._stop is not None:
+                self._stop.set()
+            self._stop = self._thread = None
+
+    def _leagues(self, now):
+        with self._lock:
+            for owner in [owner for owner, entry in self._owners.items() if now - entry["last_seen"] > self.idle_timeout]:
+                del self._owners[owner]
+            leagues = {}
+            for entry in sorted(self._owners.values(), key=lambda entry: entry["last_seen"]):
+                leagues[entry["league_id"]] = entry["session"]
+            return leagues
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            for league_id, session in self._leagues(time.time()).items():
+                try:
+                    self.refresh(league_id, session)
+                except Exception as e:
+                    logging.warning(f"Prefetch failed for league {league_id}: {e}")
+
+    def refresh(self, league_id, session):
+        # Reload what would expire before the next tick so readers never wait on Fantrax. Only entries someone has
+        # already read are kept warm, so an idle page never pulls every roster and pool in the league.
+        api = fantrax_session.api_for(league_id, session)
+        min_remaining = self.interval * 1.5
+        calls = [("standings",)]
+        calls += [("roster_info", team.team_id) for team in api.teams]
+        calls += [("get_available_players", position) for position in POSITIONS]
+        for endpoint, *args in calls:
+            if fantrax_cache.stored_at(api, endpoint, *args) is not None:
+                fantrax_cache.refresh(api, endpoint, *args, min_remaining=min_remaining)
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher(interval=600, idle_timeout=1800):
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher(interval=interval, idle_timeout=idle_timeout)
+        return _prefetcher
+
+def format_age(seconds):
+    if seconds is None:
+        return "not loaded"
+    if seconds < 60:
+        return f"{int(seconds)}s old"
+    return f"{int(seconds // 60)}m old"
@@ -0,0 +1,168 @@
+import datetime
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import scoring
+
+# Rest-of-season roto simulation: totals grow by a noisy increment per team and category, every simulated
+# season is re-ranked, and a small nudge to one team's category shows how many roto points it is worth.
+SEASON_START = (10, 8)
+SEASON_END = (4, 17)
+SEASON_GAMES = 82
+RATE_COLUMNS = {'GAA'}
+SIM_CHUNK = 500
+# Only the active lineup scores in roto: bench, IR and minors slots are left out, and what remains is scaled
+# to a typical lineup so a deep roster isn't counted as extra scorers
+INACTIVE_SLOTS = {'RES', 'BN', 'BENCH', 'IR', 'IR+', 'MIN', 'MINORS', 'NA'}
+SKATER_LINEUP = 18
+GOALIE_LINEUP = 2
+
+def season_remaining(today=None, start=SEASON_START, end=SEASON_END):
+    today = today or datetime.date.today()
+    season_year = today.year if today.month >= start[0] else today.year - 1
+    first = datetime.date(season_year, *start)
+    last = datetime.date(season_year + 1, *end)
+    return float(np.clip((last - today).days / (last - first).days, 0.0, 1.0))
+
+def categories(standings_df):
+    return [column for column in standings_df.columns
+            if column not in scoring.NON_CATEGORY_COLUMNS and pd.api.types.is_numeric_dtype(standings_df[column])
+            and standings_df[column].notna().any()]
+
+def is_rate(column, values):
+    return column in RATE_COLUMNS or '%' in column or 0 < np.nanmax(np.abs(values)) < 1
+
+def active_lineup(frame):
+    if 'Position' not in frame:
+        return frame
+    return frame[~frame['Position'].astype(str).str.strip().str.upper().isin(INACTIVE_SLOTS)]
+
+def roster_rates(roster_frames, teams, columns, games_left):
+    # Expected rest-of-season totals from the active lineup's per-game pace; NaN where a team or stat is unknown
+    expected = np.full((len(teams), len(columns)), np.nan)
+    for i, team in enumerate(teams):
+        frame = roster_frames.get(team)
+        if frame is None or 'GP' not in frame:
+            continue
+        frame = active_lineup(frame)
+        games = frame['GP'].to_numpy(dtype=float)
+        played = games > 0
+        goalies = frame['Position'].astype(str).str.upper().str.contains('G').to_numpy() if 'Position' in frame else np.zeros(len(frame), bool)
+        for j, column in enumerate(columns):
+            if column in frame and pd.api.types.is_numeric_dtype(frame[column]):
+                values = frame[column].to_numpy(dtype=float)
+                counted = played & ~np.isnan(values)
+                if not counted.any():
+                    continue
+                # A column mostly filled by goalies is a goalie stat, and only that many goalies dress
+                lineup = GOALIE_LINEUP if goalies[counted].mean() > 0.5 else SKATER_LINEUP
+                per_game = values[counted] / games[counted]
+                expected[i, j] = np.sum(per_game) * min(1.0, lineup / counted.sum()) * games_left
+    return expected
+
+def simulate(standings_df, roster_frames=None, n_sims=2000, remaining=None, dispersion=2.0, seed=0):
+    teams = standings_df['team'].astype(str).to_list()
+    columns = categories(standings_df)
+    if not teams or not columns:
+        return None
+    remaining = season_remaining() if remaining is None else remaining
+    current = standings_df[columns].to_numpy(dtype=float)
+    current = np.where(np.isnan(current), np.nanmean(current, axis=0), current)
+    rate = np.array([is_rate(column, current[:, j]) for j, column in enumerate(columns)])
+    sign = scoring.signs(columns)
+
+    # Counting stats keep their pace (or the roster's per-game pace) with overdispersed noise; rate stats drift
+    elapsed = max(1.0 - remaining, 0.05)
+    pace = current * (remaining / elapsed)
+    if roster_frames:
+        from_rosters = roster_rates(roster_frames, teams, columns, SEASON_GAMES * remaining)
+        pace = np.where(np.isnan(from_rosters), pace, from_rosters)
+    mean = np.where(rate, 0.0, np.clip(pace, 0, None))
+    spread = np.nanstd(current, axis=0)
+    sd = np.where(rate, 0.5 * spread * np.sqrt(remaining), np.sqrt(np.clip(mean, 1, None) * dispersion))
+    if remaining <= 0:
+        # The season is over: final standings are the current ones
+        sd = np.zeros_like(sd)
+
+    rng = np.random.default_rng(seed)
+    final = current + mean + rng.standard_normal((n_sims, len(teams), len(columns))) * sd
+    score = final * sign
+
+    # Roto points per category: last place gets 1, first gets n_teams
+    points = score.argsort(axis=1).argsort(axis=1) + 1.0
+    totals = points.sum(axis=2) + rng.uniform(0, 1e-6, (n_sims, len(teams)))
+    final_rank = (-totals).argsort(axis=1).argsort(axis=1) + 1
+
+    rank_probs = np.stack([(final_rank == r).mean(axis=0) for r in range(1, len(teams) + 1)], axis=1)
+
+    # Points gained if one team had `step` more of a category in every simulated season: count of rivals it passes
+    step = np.where(rate, np.maximum(np.abs(np.nanmean(current, axis=0)) * 0.01, 1e-3), 1.0)
+    # Pairwise gaps are sims x teams x teams x categories, so take them a chunk of seasons at a time
+    passed = np.zeros((len(teams), len(columns)))
+    for start in range(0, n_sims, SIM_CHUNK):
+        chunk = score[start:start + SIM_CHUNK]
+        gap = chunk[:, None, :, :] - chunk[:, :, None, :]
+        passed += ((gap > 0) & (gap <= step)).sum(axis=(0, 2))
+    marginal = passed / n_sims
+
+    ranks = pd.DataFrame(rank_probs, index=teams, columns=range(1, len(teams) + 1))
+    return {
+        "teams": teams,
+        "categories": columns,
+        "remaining": remaining,
+        "n_sims": n_sims,
+        "rank_probs": ranks,
+        "expected_rank": pd.Series(rank_probs @ np.arange(1, len(teams) + 1), index=teams),
+        "expected_points": pd.DataFrame(points.mean(axis=0), index=teams, columns=columns),
+        "marginal": pd.DataFrame(marginal, index=teams, columns=columns),
+        "steps": pd.Series(step, index=columns),
+    }
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+MAX_CACHED = 32
+
+def snapshot_key(standings_df, roster_frames, n_sims, remaining):
+    parts = [int(pd.util.hash_pandas_object(standings_df, index=False).sum())]
+    for team in sorted(roster_frames or {}):
+        parts.append((team, int(pd.util.hash_pandas_object(roster_frames[team], index=False).sum())))
+    return (tuple(parts), n_sims, round(remaining, 3))
+
+def project(standings_df, roster_frames=None, n_sims=2000, remaining=None):
+    # One simulation per standings snapshot; reruns, prompts and tools read the cached result
+    remaining = season_remaining() if remaining is None else remaining
+    key = snapshot_key(standings_df, roster_frames, n_sims, remaining)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = simulate(standings_df, roster_frames, n_sims, remaining)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return result
+
+def for_league(api, standings_df, n_sims=2000):
+    # The one path the app uses, so the recommendation prompt and the agent tool quote the same odds
+    import league_rosters
+    rosters = league_rosters.load(api)
+    frames = {name: rosters.frame(team_id) for team_id, name, _ in rosters.items()}
+    return project(standings_df, frames, n_sims)
+
+def summary(result, team_name, top=3):
+    if result is None:
+        return None
+    team = next((name for name in result["teams"] if name.lower() == str(team_name).lower()), None)
+    if team is None:
+        return None
+    probs = result["rank_probs"].loc[team]
+    marginal = result["marginal"].loc[team].sort_values(ascending=False)
+    steps = result["steps"]
+    levers = ", ".join(f"{column} (+{steps[column]:g} = +{value:.2f} pts)" for column, value in marginal.head(top).items())
+    return (f"{team}: projected finish {result['expected_rank'][team]:.1f}, "
+            f"P(1st) {probs[1]:.0%}, P(top 3) {probs.loc[:3].sum():.0%} over {result['n_sims']} simulated seasons "
+            f"({result['remaining']:.0%} of season left). Most valuable categories: {levers}.")
@@ -0,0 +1,100 @@
+import math
+
+import pandas as pd
+
+CHARS_PER_TOKEN = 4
+SEPARATOR = '|'
+NULL_VALUES = {'', 'N/A', 'None', 'nan'}
+
+# Columns dropped first when a section is over budget, before any rows go
+ROSTER_DROP_ORDER = ['Latest', 'Analysis', 'Team']
+STANDINGS_DROP_ORDER = []
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f"{value:.4g}"
+    text = str(value).replace(SEPARATOR, '/').replace('\n', ' ').strip()
+    return '' if text in NULL_VALUES else text
+
+def _render(df):
+    header = SEPARATOR.join(str(column) for column in df.columns)
+    lines = [SEPARATOR.join(format_value(value) for value in row) for row in df.itertuples(index=False, name=None)]
+    return header, lines
+
+def _drop_empty_columns(df):
+    keep = [column for column in df.columns if any(format_value(value) for value in df[column])]
+    return df[keep]
+
+def roster_priority(roster_df):
+    # Best player of every slot type first (so goalies and IR survive), then the next best of each, empty slots last
+    df = pd.DataFrame(roster_df).reset_index(drop=True)
+    rank = df['RkOv'] if 'RkOv' in df else pd.Series(range(len(df)), dtype=float)
+    groups = df['Position'].astype(str) if 'Position' in df else pd.Series('', index=df.index)
+    priority = rank.groupby(groups).rank(method='first', na_option='bottom')
+    if 'Player' in df:
+        priority = priority.where(~df['Player'].astype(str).isin(NULL_VALUES), len(df) + 1)
+    return priority.to_numpy()
+
+def standings_priority(standings_df, team_name=None):
+    # Rank order, with the user's own team pinned whatever its rank
+    priority = pd.Series(range(len(standings_df)), dtype=float)
+    if team_name is not None and 'team' in standings_df:
+        mine = standings_df['team'].astype(str).str.lower().to_numpy() == str(team_name).lower()
+        priority[mine] = -1
+    return priority.to_numpy()
+
+def encode_frame(df, drop_order=(), max_tokens=None, priority=None):
+    df = _drop_empty_columns(pd.DataFrame(df))
+    drop_order = [column for column in drop_order if column in df.columns]
+
+    while True:
+        header, lines = _render(df)
+        text = '\n'.join([header] + lines)
+        tokens = estimate_tokens(text)
+        if max_tokens is None or tokens <= max_tokens:
+            return text, tokens
+        if drop_order:
+            df = df.drop(columns=drop_order.pop(0))
+            continue
+        break
+
+    # Rows are kept in priority order (row order by default) until the budget runs out, then shown in their original order
+    order = range(len(lines)) if priority is None else sorted(range(len(lines)), key=lambda i: priority[i])
+    budget = max_tokens * CHARS_PER_TOKEN - len(header)
+    kept = set()
+    for i in order:
+        budget -= len(lines[i]) + 1
+        if budget < 0:
+            break
+        kept.add(i)
+    text = '\n'.join([header] + [line for i, line in enumerate(lines) if i in kept])
+    return text, estimate_tokens(text)
+
+def encode_context(roster_df, standings_df, max_tokens=None, team_name=None):
+    standings_df = standings_df.copy()
+    if 'team' in standings_df.columns:
+        standings_df['team'] = standings_df['team'].astype(str)
+    if 'rank' in standings_df.columns:
+        standings_df = standings_df.sort_values('rank')
+    standings_df = standings_df.reset_index(drop=True)
+
+    roster_budget = standings_budget = None
+    if max_tokens is not None:
+        roster_size = estimate_tokens(encode_frame(roster_df)[0])
+        standings_size = estimate_tokens(encode_frame(standings_df)[0])
+        roster_budget = int(max_tokens * roster_size / max(1, roster_size + standings_size))
+        standings_budget = max_tokens - roster_budget
+
+    roster_text, roster_tokens = encode_frame(roster_df, ROSTER_DROP_ORDER, roster_budget, roster_priority(roster_df))
+    standings_text, standings_tokens = encode_frame(standings_df, STANDINGS_DROP_ORDER, standings_budget,
+                                                    standings_priority(standings_df, team_name))
+    return {
+        "roster": roster_text,
+        "standings": standings_text,
+        "tokens": roster_tokens + standings_tokens,
+    }
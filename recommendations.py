@@ -0,0 +1,83 @@
+import logging
+
+LLM_MODEL = 'gemini-1.5-flash-8b'
+LLM_TEMPERATURE = 0.8
+
+def season_outlook(api, standings_df, team_name, n_sims=2000):
+    # Same projection as the project_standings agent tool; a failed roster load only costs the prompt this section
+    import projection
+    try:
+        return projection.summary(projection.for_league(api, standings_df, n_sims), team_name)
+    except Exception:
+        logging.exception("Season projection failed")
+        return None
+
+def recommendation_prompt(api, team_name, roster_df, standings_df, token_budget=3000, n_sims=2000):
+    # Shared by the Home page and the nightly batch, so both send the same prompt and share cached answers
+    import prompt_context
+    prompt_data = prompt_context.encode_context(roster_df, standings_df, token_budget, team_name)
+    outlook = season_outlook(api, standings_df, team_name, n_sims) or "Not available."
+    prompt = f"""
+            You are an expert fantasy hockey advisor. Analyze the current roster and league standings to suggest improvements for {team_name}.
+            Tables below are pipe-separated with a header row; empty cells mean no data.
+            Current Roster:
+            {prompt_data['roster']}
+            League Standings:
+            {prompt_data['standings']}
+            Season Projection (simulated rest of season):
+            {outlook}
+            Instructions:
+            - Provide a detailed analysis of the team's strengths and weaknesses. Use the response template provided.
+            - Recommend actions: pick up, drop, or trade players. Justify each recommendation with specific statistics.
+            - Prioritize the categories with the highest projected roto-point value and cite those numbers.
+            - For player pickups, describe desired characteristics (e.g., high goal-scoring ability) to assist in searching free agents.
+            - Be blunt when assessing underperformers—no sugarcoating - name players explicitly when assessing underperformers.
+            - Keep responses to 275 words max.
+            Response Template:
+            Current Situation: [Team Name] is ranked [Current Rank] with [Points Total] points. Areas that need improvement include:
+            - Statistic 1: (e.g., Goals: [X], below league leaders.)
+            - Statistic 2: (e.g., Assists: [X], significantly lower than the top teams.)
+            - Goalie Stats: (e.g., Save percentage and shutouts fall below league average.)
+            - Overall Performance: [Team Name] lags in combined offensive and defensive stats.
+            - Top Performers: (e.g., [Top Player] excels in goals/assists.)
+            - Bottom Performers: (e.g., [Underperforming Player] is falling short.)
+            Recommendations:
+              * Focus Area 1:
+                - Recommendation: (e.g., Acquire a high-scoring forward. Look for consistent scorers with 10+ goals or 15+ assists.)
+                - Rationale: (e.g., More scoring power is key to closing the gap with the league leaders.)
+              * Focus Area 2:
+                - Recommendation: (e.g., Improve goaltending by adding a goalie with a save percentage above .910.)
+                - Rationale: (e.g., Stronger goaltending will improve point stability and boost ranking.) 
+        """
+    return prompt, prompt_data
+
+def shortlist_free_agents(api, standings_df, team_name, k=3, positions=None):
+    # Rank the whole pool against the team's category needs locally, only the shortlist reaches the LLM
+    import evaluation
+    import scoring
+    return evaluation.fetch_candidates(api, positions or evaluation.POSITIONS,
+                                       lambda api, position: scoring.shortlist(api, position, standings_df, team_name, k=k))
+
+def evaluate_free_agents(api, context, standings_df, team_name, llm_fn, k=3, max_workers=4, batch_size=1, shortlists=None, positions=None, errors=None):
+    # Shortlists passed in are evaluated as given; missing positions are ranked here and written back
+    import evaluation
+    import scoring
+
+    positions = positions or evaluation.POSITIONS
+
+    def shortlist(api, position):
+        if shortlists is not None and position in shortlists:
+            return shortlists[position]
+        players = scoring.shortlist(api, position, standings_df, team_name, k=k)
+        if shortlists is not None:
+            shortlists[position] = players
+        return players
+
+    try:
+        return evaluation.run_player_evaluation(api, context, llm_fn, max_workers=max_workers, batch_size=batch_size,
+                                                positions=positions, fetch_fn=shortlist, errors=errors)
+    except Exception as e:
+        logging.warning(f"Error during player evaluation execution: {e}")
+        if errors is not None:
+            errors.append(e)
+        return []
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+import fantrax_cache
+import utils
+
+# Roto categories where a smaller total ranks higher
+LOWER_IS_BETTER = {'GAA', 'GA', 'L', 'OTL'}
+NON_CATEGORY_COLUMNS = {'team', 'rank', 'is_my_team', 'RkOv', 'Rk', 'GP', 'Age', 'Pts', 'FPts', 'FP/G', 'Points', '%Own', '+/-Own'}
+
+def categories(standings_df, pool_df):
+    shared = [column for column in standings_df.columns if column in pool_df.columns and column not in NON_CATEGORY_COLUMNS]
+    return [column for column in shared
+            if pd.api.types.is_numeric_dtype(standings_df[column]) and pd.api.types.is_numeric_dtype(pool_df[column])]
+
+def signs(columns):
+    return np.array([-1.0 if column in LOWER_IS_BETTER else 1.0 for column in columns])
+
+def team_needs(standings_df, team_name, columns):
+    # Weight each category by how far down the league the team sits in it
+    values = standings_df[columns].to_numpy(dtype=float) * signs(columns)
+    mine = standings_df['team'].astype(str).str.lower() == str(team_name).lower()
+    if not mine.any() or not columns:
+        return pd.Series(1.0 / max(1, len(columns)), index=columns)
+    my_values = values[mine.to_numpy()][0]
+    percentile = np.nanmean(values < my_values, axis=0)
+    needs = 1.0 - percentile
+    if np.nansum(needs) == 0:
+        needs = np.ones(len(columns))
+    needs = np.nan_to_num(needs)
+    return pd.Series(needs / needs.sum(), index=columns)
+
+def score_pool(pool_df, needs):
+    columns = list(needs.index)
+    values = pool_df[columns].to_numpy(dtype=float) * signs(columns)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    z = np.nan_to_num((values - mean) / std)
+    contributions = z * needs.to_numpy()
+
+    scored = pool_df.copy()
+    scored['Score'] = contributions.sum(axis=1)
+    for i, column in enumerate(columns):
+        scored[f"{column} contrib"] = contributions[:, i]
+    return scored.sort_values('Score', ascending=False)
+
+def shortlist(api, position, standings_df, team_name, k=3):
+    available_players = fantrax_cache.get_available_players(api, position)
+    if not available_players or not getattr(available_players, 'rows', None):
+        return None
+    pool_df = utils.playerstats_to_dataframe(available_players)
+    columns = categories(standings_df, pool_df)
+    if not columns:
+        # Rank order alone; forced numeric so a stray text rank can't make it sort as strings
+        ranked = pool_df.assign(RkOv=utils.coerce_numeric(pool_df['RkOv'], force=True))
+        return ranked.sort_values(by='RkOv', ascending=True).head(k).to_dict(orient='records')
+    scored = score_pool(pool_df, team_needs(standings_df, team_name, columns))
+    return scored.head(k).round(2).to_dict(orient='records')
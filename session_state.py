@@ -0,0 +1,220 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+import fantrax_cache
+import telemetry
+
+# st.session_state only keeps the login and team selection; league data lives once per league here, and
+# chat transcripts, memories and LLM handles live in per-session slots that are capped and evicted when idle.
+
+# *** SHARED LEAGUE DATA ***
+class LeagueStore:
+    # Converted frames and prompt encodings for one league, rebuilt only when the cached Fantrax payload changes.
+    # Every session reads the same entries, so frames are handed out as copies a page is free to modify.
+    def __init__(self, league_id):
+        self.league_id = league_id
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._analyses = {}
+
+    def _memo(self, key, version, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        value = build()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (version, value)
+        return value
+
+    def standings(self, api, stat_table=None):
+        import utils
+        collection = fantrax_cache.standings(api)
+        stat_table = utils.stat_table_caption(collection, stat_table or st.secrets.get("default_stat"))
+        df = self._memo(("standings", stat_table), fantrax_cache.stored_at(api, "standings"),
+                        lambda: utils.fetch_standings(api, stat_table=stat_table))
+        return None if df is None else df.copy()
+
+    def roster(self, api, team_id):
+        import utils
+        fantrax_cache.roster_info(api, team_id)
+        df = self._memo(("roster", team_id), fantrax_cache.stored_at(api, "roster_info", team_id),
+                        lambda: utils.fetch_team_roster(api, team_id))
+        return None if df is None else df.copy()
+
+    def context(self, api, team_id, token_budget, team_name=None):
+        import prompt_context
+        standings_df = self.standings(api)
+        roster_df = self.roster(api, team_id)
+        if standings_df is None or roster_df is None:
+            return None
+        version = (fantrax_cache.stored_at(api, "standings"), fantrax_cache.stored_at(api, "roster_info", team_id))
+        return self._memo(("context", team_id, token_budget, team_name), version,
+                          lambda: prompt_context.encode_context(roster_df, standings_df, token_budget, team_name))
+
+    def last_analysis(self, key):
+        with self._lock:
+            return self._analyses.get(key)
+
+    def save_analysis(self, key, analysis):
+        # The last analyzed snapshot per team, so a rerun can diff against it instead of asking the LLM again
+        with self._lock:
+            self._analyses[key] = analysis
+
+    def nbytes(self):
+        with self._lock:
+            return (sum(estimate_bytes(value) for _, value in self._entries.values())
+                    + estimate_bytes(self._analyses))
+
+# *** PER-SESSION SLOTS ***
+class SessionSlot:
+    def __init__(self, session_id, league_id, max_messages=50):
+        self.session_id = session_id
+        self.league_id = league_id
+        self.max_messages = max_messages
+        self.last_seen = time.time()
+        self.transcripts = {}
+        self.memories = {}
+        self.llm = None
+        self.llm_config = None
+
+    def transcript(self, page):
+        return self.transcripts.setdefault(page, [])
+
+    def append(self, page, role, content):
+        transcript = self.transcript(page)
+        transcript.append({'role': role, 'content': content})
+        # The display keeps the latest messages only; the LLM already sees a summary of anything older
+        del transcript[:-self.max_messages]
+
+    def memory(self, page, factory):
+        if page not in self.memories:
+            self.memories[page] = factory()
+        return self.memories[page]
+
+    def clear_chat(self, page):
+        self.transcripts.pop(page, None)
+        memory = self.memories.get(page)
+        if memory is not None:
+            memory.clear()
+
+    def nbytes(self):
+        # LLM clients are shared across sessions, so only the chat state counts against this one
+        size = sum(estimate_bytes(transcript) for transcript in self.transcripts.values())
+        for memory in self.memories.values():
+            size += estimate_bytes(memory.summary) + estimate_bytes(memory.messages)
+        return size
+
+class SessionManager:
+    def __init__(self, idle_timeout=1800, max_messages=50, sweep_interval=60):
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._leagues = {}
+        self._swept_at = 0
+
+    def slot(self, session_id, league_id):
+        now = time.time()
+        with self._lock:
+            if now - self._swept_at > self.sweep_interval:
+                self._sweep(now)
+            slot = self._slots.get(session_id)
+            if slot is None or slot.league_id != league_id:
+                slot = self._slots[session_id] = SessionSlot(session_id, league_id, self.max_messages)
+            slot.last_seen = now
+            return slot
+
+    def league(self, league_id):
+        with self._lock:
+            if league_id not in self._leagues:
+                self._leagues[league_id] = LeagueStore(league_id)
+            return self._leagues[league_id]
+
+    def evict(self, session_id):
+        with self._lock:
+            self._slots.pop(session_id, None)
+
+    def _sweep(self, now):
+        self._swept_at = now
+        for session_id in [session_id for session_id, slot in self._slots.items() if now - slot.last_seen > self.idle_timeout]:
+            del self._slots[session_id]
+        active = {slot.league_id for slot in self._slots.values()}
+        for league_id in [league_id for league_id in self._leagues if league_id not in active]:
+            del self._leagues[league_id]
+
+    def report(self):
+        now = time.time()
+        with self._lock:
+            slots = list(self._slots.values())
+            leagues = dict(self._leagues)
+        sessions_per_league = {}
+        for slot in slots:
+            sessions_per_league[slot.league_id] = sessions_per_league.get(slot.league_id, 0) + 1
+        shared = {league_id: store.nbytes() for league_id, store in leagues.items()}
+        return [{
+            "session_id": slot.session_id,
+            "league_id": slot.league_id,
+            "idle_s": round(now - slot.last_seen, 1),
+            "own_bytes": slot.nbytes(),
+            "shared_bytes": shared.get(slot.league_id, 0) // sessions_per_league[slot.league_id],
+        } for slot in slots]
+
+def estimate_bytes(value):
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager(st.secrets.get("session_idle_timeout", 1800), st.secrets.get("chat_history_max", 50))
+        return _manager
+
+def current():
+    return get_manager().slot(telemetry.current_session(), st.session_state['league_id'])
+
+def league_store(league_id):
+    return get_manager().league(league_id)
+
+def evict_current():
+    get_manager().evict(telemetry.current_session())
+
+_llms = OrderedDict()
+_llms_lock = threading.Lock()
+
+def shared_llm(config, factory, max_entries=32):
+    # Sessions with the same provider, model and key share one client
+    with _llms_lock:
+        if config in _llms:
+            _llms.move_to_end(config)
+            return _llms[config]
+    llm = factory()
+    with _llms_lock:
+        _llms[config] = llm
+        while len(_llms) > max_entries:
+            _llms.popitem(last=False)
+    return llm
+
+def format_bytes(n):
+    return f"{n / 1024:.0f} KB" if n < 1024 * 1024 else f"{n / 1024 / 1024:.1f} MB"
+
+def render_memory():
+    session_id = telemetry.current_session()
+    mine = next((entry for entry in get_manager().report() if entry["session_id"] == session_id), None)
+    if mine:
+        st.sidebar.caption(f"Session memory: {format_bytes(mine['own_bytes'])} own, {format_bytes(mine['shared_bytes'])} share of league data")
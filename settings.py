@@ -0,0 +1,11 @@
+import streamlit as st
+
+# st.secrets reads .streamlit/secrets.toml; outside a deployed app (batch runs, benchmarks, scripts) there may be none
+def secrets():
+    try:
+        return dict(st.secrets)
+    except FileNotFoundError:
+        return {}
+
+def get(key, default=None):
+    return secrets().get(key, default)
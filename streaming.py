@@ -0,0 +1,33 @@
+import time
+
+def render_stream(placeholder, chunks, min_interval=0.1, min_chars=40, cursor="_"):
+    # Coalesce chunks into at most one UI update per min_interval/min_chars instead of sleeping between characters
+    start = time.perf_counter()
+    first_token_at = None
+    last_flush = start
+    pending = 0
+    text = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        text += chunk
+        pending += len(chunk)
+        now = time.perf_counter()
+        if pending >= min_chars or now - last_flush >= min_interval:
+            placeholder.markdown(text + cursor)
+            pending = 0
+            last_flush = now
+    placeholder.markdown(text)
+
+    timing = {
+        "ttft": first_token_at - start if first_token_at is not None else None,
+        "total": time.perf_counter() - start,
+    }
+    return text, timing
+
+def format_timing(timing):
+    if timing["ttft"] is None:
+        return f"No tokens received ({timing['total']:.2f}s)"
+    return f"First token {timing['ttft']:.2f}s, complete {timing['total']:.2f}s"
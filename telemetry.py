@@ -0,0 +1,93 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+import settings
+
+_records = deque(maxlen=5000)
+_lock = threading.Lock()
+_session = contextvars.ContextVar("telemetry_session", default=None)
+
+def current_session():
+    session = _session.get()
+    if session is not None:
+        return session
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+        return ctx.session_id if ctx else None
+    except Exception:
+        return None
+
+def bind(fn):
+    # Worker threads have no script context, so carry the caller's session across explicitly
+    session = current_session()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _session.set(session)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _session.reset(token)
+    return wrapper
+
+def _export_path():
+    return settings.get("telemetry_path")
+
+def record(entry):
+    with _lock:
+        _records.append(entry)
+        path = _export_path()
+        if path:
+            with open(path, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+@contextmanager
+def span(name, **attrs):
+    entry = {"ts": time.time(), "session": current_session(), "name": name, "cache": None,
+             "prompt_tokens": None, "completion_tokens": None, "error": None, **attrs}
+    start = time.perf_counter()
+    try:
+        yield entry
+    except Exception as e:
+        entry["error"] = repr(e)
+        raise
+    finally:
+        entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        record(entry)
+
+def traced(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def records(session=None):
+    with _lock:
+        return [entry for entry in _records if session is None or entry["session"] == session]
+
+def to_jsonl(entries):
+    return "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+
+def render_panel():
+    if not st.sidebar.toggle("Show diagnostics", value=st.secrets.get("diagnostics", False)):
+        return
+    entries = records(current_session())
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        if not entries:
+            st.caption("No spans recorded yet.")
+            return
+        rows = [{key: entry.get(key) for key in ["name", "duration_ms", "cache", "prompt_tokens", "completion_tokens", "error"]}
+                for entry in reversed(entries)]
+        st.dataframe(rows, use_container_width=True)
+        st.download_button("Export JSON lines", to_jsonl(entries), file_name="diagnostics.jsonl", mime="application/x-ndjson")
@@ -0,0 +1,54 @@
+import pandas as pd
+
+import change_detection
+
+def roster(changes=None):
+    df = pd.DataFrame({
+        "Position": ["C", "LW", "N/A", "N/A"],
+        "Player": ["Connor McDavid", "Zach Hyman", "N/A", "N/A"],
+        "Team": ["EDM", "EDM", "N/A", "N/A"],
+        "Status": ["", "", "", ""],
+        "G": [20.0, 12.0, 0.0, 0.0],
+        "Latest": ["", "", "", ""],
+    })
+    for (row, column), value in (changes or {}).items():
+        df.loc[row, column] = value
+    return df
+
+STANDINGS = pd.DataFrame({"team": ["A", "B"], "rank": [1, 2], "G": [100.0, 90.0]})
+
+def diff(before, after, standings_after=STANDINGS):
+    return change_detection.diff(change_detection.snapshot(before, STANDINGS), change_detection.snapshot(after, standings_after))
+
+def test_duplicate_keys_are_kept():
+    rows = change_detection.fingerprints(roster(), change_detection.KEY_COLUMNS["roster"])
+    assert len(rows) == 4
+
+def test_no_change_scores_zero():
+    changes = diff(roster(), roster())
+    assert change_detection.score(changes) == 0
+    assert change_detection.describe(changes) == []
+
+def test_news_alone_is_ignored():
+    changes = diff(roster(), roster({(0, "Latest"): "Day-to-day"}))
+    assert change_detection.score(changes) == 0
+
+def test_slot_move_counts_as_a_roster_move():
+    changes = diff(roster(), roster({(1, "Position"): "IR"}))
+    assert changes["roster"]["added"] == ["Zach Hyman / IR"]
+    assert changes["roster"]["removed"] == ["Zach Hyman / LW"]
+    assert change_detection.is_material(changes)
+
+def test_status_change_is_scored_and_described():
+    changes = diff(roster(), roster({(0, "Status"): "DTD"}))
+    assert changes["roster"]["edits"] == {"Connor McDavid / C": [("Status", "", "DTD")]}
+    assert change_detection.score(changes) == 1.0
+    assert change_detection.describe(changes) == ["Roster: Connor McDavid / C (Status →DTD)"]
+
+def test_stat_moves_respect_tolerance():
+    assert change_detection.score(diff(roster(), roster({(0, "G"): 20.5}))) == 0
+    assert change_detection.score(diff(roster(), roster({(0, "G"): 25.0}))) == 0.5
+
+def test_rank_move_counts_fully():
+    standings = STANDINGS.assign(rank=[2, 1])
+    assert change_detection.score(diff(roster(), roster(), standings)) == 2.0
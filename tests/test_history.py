@@ -0,0 +1,50 @@
+import pandas as pd
+import pyarrow.dataset as ds
+
+import history
+
+def roster(**stats):
+    return pd.DataFrame({
+        "team_id": ["t1"] * 4,
+        "Position": ["C", "N/A", "N/A", "IR"],
+        "Player": ["Connor McDavid", "N/A", "N/A", "Evander Kane"],
+        "G": [stats.get("mcdavid", 10), 0, 0, 2],
+    })
+
+def stored_rows(store):
+    return ds.dataset(store._path("L1", "roster"), format="parquet", partitioning="hive").to_table().num_rows
+
+def test_duplicate_keys_are_all_written(tmp_path):
+    store = history.HistoryStore(str(tmp_path))
+    assert store._write("L1", "roster", roster()) == 4
+    assert stored_rows(store) == 4
+
+def test_unchanged_snapshot_writes_nothing(tmp_path):
+    store = history.HistoryStore(str(tmp_path))
+    store._write("L1", "roster", roster())
+    assert store._write("L1", "roster", roster()) == 0
+
+def test_only_changed_rows_are_written(tmp_path):
+    store = history.HistoryStore(str(tmp_path))
+    store._write("L1", "roster", roster())
+    assert store._write("L1", "roster", roster(mcdavid=11)) == 1
+
+def test_duplicate_keys_survive_a_restart(tmp_path):
+    history.HistoryStore(str(tmp_path))._write("L1", "roster", roster())
+    # A fresh store reloads the last hashes from disk, duplicates included
+    assert history.HistoryStore(str(tmp_path))._write("L1", "roster", roster()) == 0
+
+def test_schema_is_reused_and_extended(tmp_path, monkeypatch):
+    store = history.HistoryStore(str(tmp_path))
+    store._write("L1", "roster", roster())
+    assert store.query("L1", "roster") is not None
+    opened = []
+    unify = history.pa.unify_schemas
+    monkeypatch.setattr(history.pa, "unify_schemas", lambda schemas: opened.append(len(schemas)) or unify(schemas))
+    store.query("L1", "roster")
+    assert opened == []
+    # A new column in a later snapshot reaches queries after one more footer read
+    store._write("L1", "roster", roster(mcdavid=11).assign(A=[1, 2, 3, 4]))
+    table = store.query("L1", "roster")
+    assert opened == [2]
+    assert "A" in table.columns and len(table) == 8
@@ -0,0 +1,28 @@
+import player_index
+
+def index():
+    idx = player_index.PlayerIndex()
+    idx.add("Edmonton Oilers", "team", team_id="t1")
+    idx.add("Connor McDavid", "player", team="Edmonton Oilers")
+    idx.add("Juraj Slafkovský", "player", team="Montreal Canadiens")
+    idx.add("Connor Brown", "player", team=player_index.FREE_AGENT)
+    return idx
+
+def test_normalize_folds_accents_case_and_order():
+    assert player_index.normalize("Slafkovsky, Juraj.") == player_index.normalize("juraj slafkovský") == "juraj slafkovsky"
+
+def test_exact_match_scores_one():
+    assert index().lookup("CONNOR MCDAVID") == [(index().entries[1], 1.0)]
+
+def test_misspelling_finds_the_player():
+    assert index().best("Conor McDavd")["name"] == "Connor McDavid"
+
+def test_surname_alone_finds_the_player():
+    assert index().best("Slafkovsky")["name"] == "Juraj Slafkovský"
+
+def test_kind_filters_matches():
+    assert index().best("Edmonton Oilers", kind="player") is None
+    assert index().best("Edmonton Oilers", kind="team")["team_id"] == "t1"
+
+def test_unrelated_name_has_no_match():
+    assert index().best("Wayne Gretzky") is None
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import projection
+
+STANDINGS = pd.DataFrame({
+    "team": ["A", "B", "C", "D"],
+    "rank": [1, 2, 3, 4],
+    "GP": [40, 40, 40, 40],
+    "G": [120, 110, 100, 95],
+    "A": [180, 170, 160, 150],
+    "GAA": [2.5, 2.8, 3.0, 3.2],
+})
+
+@pytest.mark.parametrize("remaining", [0.5, 0.1])
+def test_rank_probabilities_sum_to_one(remaining):
+    result = projection.simulate(STANDINGS, n_sims=400, remaining=remaining)
+    probs = result["rank_probs"]
+    # Every team finishes somewhere, and every rank goes to exactly one team
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0)
+    np.testing.assert_allclose(probs.sum(axis=0), 1.0)
+
+def test_finished_season_keeps_current_order():
+    result = projection.simulate(STANDINGS, n_sims=50, remaining=0)
+    assert result["rank_probs"].loc["A", 1] == 1.0
+    assert result["expected_rank"].idxmax() == "D"
+
+def test_roster_rates_skip_inactive_slots():
+    roster = pd.DataFrame({"Position": ["C", "IR", "Res"], "GP": [40, 40, 40], "G": [20, 30, 30]})
+    rates = projection.roster_rates({"A": roster}, ["A", "B"], ["G"], 10)
+    assert rates[0, 0] == pytest.approx(20 / 40 * 10)
+    assert np.isnan(rates[1, 0])
+
+def test_roster_rates_scale_to_lineup_size():
+    roster = pd.DataFrame({"Position": ["C"] * 36, "GP": [10] * 36, "G": [10] * 36})
+    rates = projection.roster_rates({"A": roster}, ["A"], ["G"], 1)
+    assert rates[0, 0] == pytest.approx(projection.SKATER_LINEUP)
+
+def test_projects_standings_converted_from_text():
+    import utils
+    from bench import fixtures
+    api = fixtures.fake_api_class(fixtures.synthetic_league(n_teams=4, roster_size=12, pool_size=10))()
+    standings = utils.standings_to_dataframe(api.standings())
+    assert {'G', 'GAA', 'SV%'} <= set(projection.categories(standings))
+    frames = {team.name: utils.playerstats_to_dataframe(api.roster_info(team.team_id)) for team in api.teams}
+    result = projection.simulate(standings, frames, n_sims=200, remaining=0.5)
+    assert result is not None
+    np.testing.assert_allclose(result["rank_probs"].sum(axis=1), 1.0)
+    assert projection.summary(result, api.default_team_name)
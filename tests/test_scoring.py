@@ -0,0 +1,39 @@
+import pandas as pd
+
+import scoring
+import utils
+from bench import fixtures
+
+def league(**args):
+    return fixtures.fake_api_class(fixtures.synthetic_league(n_teams=4, roster_size=12, pool_size=40, **args))()
+
+def standings(api):
+    return utils.standings_to_dataframe(api.standings())
+
+def test_categories_found_from_converted_frames():
+    api = league()
+    pool_df = utils.playerstats_to_dataframe(api.get_available_players('F'))
+    columns = scoring.categories(standings(api), pool_df)
+    assert {'G', 'A', 'SOG', 'HIT'} <= set(columns)
+    assert 'RkOv' not in columns and 'GP' not in columns
+
+def test_shortlist_is_ordered_by_score():
+    api = league()
+    picks = scoring.shortlist(api, 'F', standings(api), api.default_team_name, k=5)
+    assert len(picks) == 5
+    scores = [pick['Score'] for pick in picks]
+    assert scores == sorted(scores, reverse=True)
+
+def test_lower_is_better_categories_count_against():
+    pool_df = pd.DataFrame({'Player': ['a', 'b'], 'GAA': [2.0, 3.5]})
+    scored = scoring.score_pool(pool_df, pd.Series({'GAA': 1.0}))
+    assert scored['Player'].to_list() == ['a', 'b']
+
+def test_shortlist_falls_back_to_numeric_rank(monkeypatch):
+    api = league()
+    monkeypatch.setattr(scoring, 'categories', lambda standings_df, pool_df: [])
+    picks = scoring.shortlist(api, 'F', standings(api), api.default_team_name, k=5)
+    ranks = [pick['RkOv'] for pick in picks]
+    assert ranks == sorted(ranks)
+    expected = sorted(int(row['stats']['RkOv']) for row in api.fixture['available_players']['F'])[:5]
+    assert ranks == expected
@@ -0,0 +1,36 @@
+import pandas as pd
+
+import utils
+from bench import fixtures
+
+def league():
+    return fixtures.fake_api_class(fixtures.synthetic_league(n_teams=4, roster_size=12, pool_size=20))()
+
+def test_player_stats_are_numeric():
+    df = utils.playerstats_to_dataframe(league().roster_info("t0"))
+    for column in ["RkOv", "GP", "G", "A"]:
+        assert pd.api.types.is_numeric_dtype(df[column]), column
+    ranks = df["RkOv"].sort_values().to_list()
+    assert ranks == sorted(ranks)
+
+def test_text_columns_stay_text():
+    df = utils.playerstats_to_dataframe(league().roster_info("t0"))
+    assert not pd.api.types.is_numeric_dtype(df["Player"])
+    assert df["Position"].dtype == "category"
+
+def test_standings_are_numeric():
+    api = league()
+    df = utils.standings_to_dataframe(api.standings())
+    for column in ["rank", "G", "GAA", "SV%"]:
+        assert pd.api.types.is_numeric_dtype(df[column]), column
+    assert not pd.api.types.is_numeric_dtype(df["team"])
+
+def test_coerce_numeric_handles_text_dtypes():
+    for dtype in [object, "string"]:
+        series = pd.Series(["1,200", "55%", "N/A", " 7 "], dtype=dtype)
+        assert utils.coerce_numeric(series).to_list()[:2] == [1200.0, 55.0]
+
+def test_partial_text_column_is_left_alone_unless_forced():
+    series = pd.Series(["12:34", "10"])
+    assert utils.coerce_numeric(series).to_list() == ["12:34", "10"]
+    assert utils.coerce_numeric(series, force=True).isna().to_list() == [True, False]
@@ -0,0 +1,219 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout
+
+import telemetry
+
+DEFAULT_TIMEOUT = (5, 30)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"}
+
+class CircuitOpenError(Exception):
+    pass
+
+# *** CIRCUIT BREAKERS ***
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures, lets one trial call through after reset_timeout
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.time() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    logging.warning(f"Circuit {self.name} open after {self.failures} failures")
+                self.opened_at = time.time()
+            self._trial = False
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker(name, failure_threshold=5, reset_timeout=30):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return _breakers[name]
+
+def backoff(attempt, base=0.25, cap=4.0):
+    # Full jitter, so retries from concurrent sessions don't land on the upstream together
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def call(name, fn, retries=2, retry_on=(Exception,)):
+    circuit = breaker(name)
+    for attempt in range(retries + 1):
+        if not circuit.allow():
+            raise CircuitOpenError(f"{name} is unavailable, try again shortly")
+        try:
+            result = fn()
+        except retry_on as e:
+            circuit.failure()
+            if attempt == retries:
+                raise
+            logging.info(f"{name} failed ({e}), retrying")
+            time.sleep(backoff(attempt))
+            continue
+        circuit.success()
+        return result
+
+# *** HTTP ***
+def never_sent(error):
+    # Failures before the request went out are safe to retry whatever the method
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, ConnectTimeout) or type(reason).__name__ == "NewConnectionError"
+
+class ResilientSession(Session):
+    # Keep-alive pool per host, a default timeout on every call, jittered retries and a breaker per upstream host.
+    # Only idempotent requests are retried after they may have reached the server (read timeouts, 5xx); anything
+    # else is retried only when it never left or was refused with 429. retry_budget caps the total time spent.
+    retries = 2
+    timeout = DEFAULT_TIMEOUT
+    retry_budget = 45
+
+    def __init__(self, pool_maxsize=16, idempotent_urls=()):
+        super().__init__()
+        # POST endpoints that only ever read, and so may be resent like a GET
+        self.idempotent_urls = tuple(idempotent_urls)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def idempotent(self, method, url):
+        return method.upper() in IDEMPOTENT_METHODS or any(str(url).startswith(prefix) for prefix in self.idempotent_urls)
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        circuit = breaker(f"http.{urlparse(url).netloc}")
+        idempotent = self.idempotent(method, url)
+        start = time.monotonic()
+        for attempt in range(self.retries + 1):
+            if not circuit.allow():
+                raise CircuitOpenError(f"{urlparse(url).netloc} is unavailable, try again shortly")
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (ConnectionError, Timeout) as e:
+                circuit.failure()
+                last = attempt == self.retries or time.monotonic() - start > self.retry_budget
+                if last or not (idempotent or never_sent(e)):
+                    raise
+                logging.info(f"{method} {url} failed ({e}), retrying")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    circuit.success()
+                    return response
+                circuit.failure()
+                last = attempt == self.retries or time.monotonic() - start > self.retry_budget
+                if last or not (idempotent or response.status_code == 429):
+                    return response
+            time.sleep(backoff(attempt))
+
+# *** HEDGING ***
+class LatencyTracker:
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p, min_samples=20):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+_latencies = {}
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+def latency(name):
+    with _breakers_lock:
+        return _latencies.setdefault(name, LatencyTracker())
+
+def hedged(name, primary, secondary=None, percentile=0.95, default_delay=10.0, retries=1):
+    # Start the backup only once the primary is slower than its usual tail, then take whichever answers first
+    tracker = latency(name)
+    if secondary is not None and breaker(name).state == "open":
+        return call(f"{name}.hedge", secondary, retries=0)
+
+    with telemetry.span(f"transport.{name}") as span:
+        start = time.perf_counter()
+        primary_future = _hedge_pool.submit(telemetry.bind(call), name, primary, retries)
+        # Every primary completion feeds the percentile, including ones that lost the race
+        primary_future.add_done_callback(lambda f: f.exception() is None and tracker.add(time.perf_counter() - start))
+        futures = {primary_future: "primary"}
+        if secondary is not None:
+            done, _ = wait(futures, timeout=tracker.percentile(percentile) or default_delay)
+            if not done or primary_future.exception() is not None:
+                span["hedged"] = True
+                futures[_hedge_pool.submit(telemetry.bind(call), f"{name}.hedge", secondary, 0)] = "secondary"
+
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                span["winner"] = futures[future]
+                return result
+        raise error
+
+# *** LLM PROVIDERS ***
+def chat_model(provider, model, api_key, timeout=60, temperature=None):
+    # Providers are imported only for the one in use; retries are left to call()/hedged()
+    extra = {} if temperature is None else {"temperature": temperature}
+    if provider == "Gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=model, google_api_key=api_key, timeout=timeout, max_retries=0, **extra)
+    if provider == "Groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(api_key=api_key, model=model, timeout=timeout, max_retries=0, **extra)
+    if provider == "OpenAI":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(openai_api_key=api_key, model_name=model, timeout=timeout, max_retries=0, **extra)
+    raise ValueError(f"Unknown LLM provider {provider}")
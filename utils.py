@@ -1,86 +1,148 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import streamlit as st
 
-def playerstats_to_dataframe(players):
-    player_data = []
-    for row in players.rows:
-        row_data = {
-            "Position": row.pos.name,
-            "Player": row.player.name if row.player else 'N/A',
-            "Team": row.player.team_short_name if row.player else 'N/A',
-            "Latest": row.latest_comment if row.latest_comment else 'N/A'
-        }
-        row_data.update(row.stats)
-        player_data.append(row_data)
-    
-    df = pd.DataFrame(player_data)
-    
+import fantrax_cache
+import settings
+import telemetry
+
+MISSING_VALUES = ['', 'N/A', '-', '--', 'None', 'nan']
+TEXT_COLUMNS = ['Player', 'Latest', 'Analysis']
+CATEGORY_COLUMNS = ['Position', 'Team']
+# Columns that are sorted and ranked on; an odd value becomes NaN rather than turning the column into text
+KEY_NUMERIC_COLUMNS = ['RkOv', 'Rk', 'rank', 'GP']
+
+def coerce_numeric(series, force=False):
+    # Stats arrive as text: object dtype on pandas 2, the str dtype on pandas 3
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    cleaned = series.astype(str).str.strip().str.replace(',', '', regex=False).str.rstrip('%')
+    cleaned = cleaned.mask(series.isna() | cleaned.isin(MISSING_VALUES))
+    numeric = pd.to_numeric(cleaned, errors='coerce')
+    # Only convert when every present value parsed, so text columns like TOI "12:34" stay as-is
+    if force or numeric.notna().sum() == cleaned.notna().sum():
+        return numeric
+    return series
+
+def typed_dataframe(columns, skip=()):
+    df = pd.DataFrame(columns)
+    for name in df.columns:
+        if name in CATEGORY_COLUMNS:
+            df[name] = df[name].astype('category')
+        elif name not in TEXT_COLUMNS and name not in skip:
+            df[name] = coerce_numeric(df[name], force=name in KEY_NUMERIC_COLUMNS)
     return df
 
+@telemetry.traced("utils.playerstats_to_dataframe")
+def playerstats_to_dataframe(players):
+    rows = players.rows
+    n = len(rows)
+    columns = {name: [None] * n for name in ["Position", "Player", "Team", "Latest"]}
+    for i, row in enumerate(rows):
+        columns["Position"][i] = row.pos.name
+        columns["Player"][i] = row.player.name if row.player else 'N/A'
+        columns["Team"][i] = row.player.team_short_name if row.player else 'N/A'
+        columns["Latest"][i] = row.latest_comment if row.latest_comment else 'N/A'
+        for name, value in row.stats.items():
+            columns.setdefault(name, [None] * n)[i] = value
+
+    return typed_dataframe(columns)
+
+def stat_table_caption(standings_collection, stat_table=None):
+    # The caption standings_to_dataframe actually reads, so every snapshot of one table carries the same label
+    captions = [caption for section in standings_collection.standings for caption, _ in section.items()]
+    if stat_table in captions or not captions:
+        return stat_table
+    return captions[0] if stat_table is None else stat_table
+
+@telemetry.traced("utils.standings_to_dataframe")
 def standings_to_dataframe(standings_collection, stat_table=None):
     for section in standings_collection.standings:
         for caption, standings in section.items():
             if caption == stat_table or stat_table is None: #ugh, will enter the first run through
-                team_records_data = []
-                for record in standings.team_records:
-                    record_data = {
-                        "team": record.team,
-                        "rank": record.rank,
-                    }
-                    record_data.update(record.data)
-                    team_records_data.append(record_data)
-                return pd.DataFrame(team_records_data)
+                records = standings.team_records
+                n = len(records)
+                columns = {"team": [None] * n, "rank": [None] * n}
+                for i, record in enumerate(records):
+                    columns["team"][i] = record.team
+                    columns["rank"][i] = record.rank
+                    for name, value in record.data.items():
+                        columns.setdefault(name, [None] * n)[i] = value
+                return typed_dataframe(columns, skip=["team"])
             
-def fetch_standings(api):
+_history_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-record")
+
+def record_history(api, kind, df, scope, endpoint, *args):
+    # Snapshot each upstream fetch once; unchanged rows are skipped by the store. pyarrow is imported on the
+    # writer thread, so the first render never pays for it.
+    root = settings.get("history_dir", "history")
+    if root:
+        version = fantrax_cache.stored_at(api, endpoint, *args)
+        _history_writer.submit(_record_history, root, api.league_id, kind, df, scope, version)
+
+def _record_history(root, league_id, kind, df, scope, version):
     try:
-        if 'standings_collection' not in st.session_state:
-            standings_collection = api.standings()
-            st.session_state['standings_collection'] = standings_collection
-        else:
-            standings_collection = st.session_state['standings_collection']
+        import history
+        history.record_safely(history.get_store(root), league_id, kind, df, scope=scope, version=version)
+    except Exception as e:
+        logging.warning(f"Could not snapshot {kind} for league {league_id}: {e}")
 
-        if st.secrets.get("default_stat"):
-            stats = st.secrets["default_stat"]
+# raise_errors=True is for callers off the script thread (agent tools, batch), where st.error has nowhere to render
+def fetch_standings(api, raise_errors=False, stat_table=None):
+    try:
+        standings_collection = fantrax_cache.standings(api)
+
+        stats = stat_table_caption(standings_collection, stat_table or settings.get("default_stat"))
 
         standings_df = standings_to_dataframe(standings_collection, stats)
+        record_history(api, "standings", standings_df.assign(table=str(stats)), stats, "standings")
         return standings_df
     except Exception as e:
+        if raise_errors:
+            raise
         st.error(f"Error fetching league standings: {e}")
         return None
 
-def fetch_team_roster(api, team_id):
+def fetch_team_roster(api, team_id, raise_errors=False):
     try:
-        if 'roster' not in st.session_state:
-            roster = api.roster_info(team_id)
-            st.session_state['roster'] = roster
-        else:
-            roster = st.session_state['roster']
-
+        roster = fantrax_cache.roster_info(api, team_id)
         roster_df = playerstats_to_dataframe(roster)
+        record_history(api, "roster", roster_df.assign(team_id=team_id), team_id, "roster_info", team_id)
         return roster_df
     except Exception as e:
+        if raise_errors:
+            raise
         st.error(f"Error fetching roster: {e}")
-        return None        
-
-def fetch_free_agents(api, position):
-    available_players = api.get_available_players(position)
-    if available_players and hasattr(available_players, 'rows') and available_players.rows:
-        df = playerstats_to_dataframe(available_players)
-        df['RkOv'] = df['RkOv'].astype(int)
-        df = df.sort_values(by='RkOv', ascending=True).head(5)
-        return df.to_dict(orient='records')
-    else:
         return None
 
+def fetch_free_agents(api, position, k=5, where=()):
+    import player_pool
+    df = player_pool.free_agents(api, position, k=k, where=where, max_pages=settings.get("free_agent_max_pages", 10))
+    if df is None or df.empty:
+        return None
+    return df.to_dict(orient='records')
+
 def fetch_roster_news(api, team_id):
     roster_df = fetch_team_roster(api, team_id)
     return roster_df[['Player', 'Latest', 'Analysis']]
 
 def search_roster_player_news(api, query: str):
-    roster_df = fetch_team_roster(api, st.session_state['selected_team_id'])
-    latest = roster_df.loc[roster_df['Player'] == query, ['Latest', 'Analysis']].values[0]
-    print(latest)
-    return latest
+    import player_index
+    team_id = st.session_state['selected_team_id']
+    roster_df = fetch_team_roster(api, team_id)
+    if roster_df is None:
+        return None
+    # Only the user's own roster is searched, so no league-wide load and no closer name on another team
+    index = player_index.PlayerIndex()
+    player_index.add_roster(index, team_id, st.session_state.get('selected_team_name', ''), fantrax_cache.roster_info(api, team_id))
+    match = index.best(query, kind="player")
+    if match is None:
+        return None
+    columns = [column for column in ['Latest', 'Analysis'] if column in roster_df]
+    rows = roster_df.loc[roster_df['Player'] == match['name'], columns]
+    return rows.values[0] if not rows.empty else None
 
 
 hockey_cliches = [